@@ -28,12 +28,15 @@ import os
 
 import xbmc
 import xbmcaddon
+import xbmcvfs
 
 KODI_ADDON_ID       = "script.xbmc.lcdproc"
 KODI_ADDON_NAME     = "XBMC LCDproc"
 KODI_ADDON_SETTINGS = xbmcaddon.Addon(id=KODI_ADDON_ID)
 KODI_ADDON_ROOTPATH = KODI_ADDON_SETTINGS.getAddonInfo("path")
 KODI_ADDON_ICON     = os.path.join(KODI_ADDON_ROOTPATH, "resources", "icon.png")
+KODI_ADDON_PROFILE  = xbmcvfs.translatePath(KODI_ADDON_SETTINGS.getAddonInfo("profile"))
+KODI_ADDON_VERSION  = KODI_ADDON_SETTINGS.getAddonInfo("version")
 
 # copy loglevel defines to the global scope
 LOGDEBUG   = xbmc.LOGDEBUG
@@ -23,6 +23,7 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
+import re
 import sys
 import time
 
@@ -31,6 +32,40 @@ import xbmcgui
 
 from .common import WINDOW_IDS
 from .settings import *
+from .systemclock import *
+
+# joins the templates of a composite InfoLabel, passes Kodi's label parser
+# unchanged and is not expected in any label value
+INFOLABEL_COMPOSITE_SEPARATOR = "\x1e"
+
+# Kodi evaluates a template without any $ that looks like "Player.Time" as a
+# single info tag instead of label text, such can't be part of a composite
+INFOLABEL_BARE_TAG_REGEX = re.compile(r'^\s*[A-Za-z]+\.[A-Za-z]')
+
+# how often a line's labels get re-evaluated, see InfoLabels.GetLabels()
+class LABEL_VOLATILITY:
+    LABEL_VOLATILITY_AUTO   = "auto"
+    LABEL_VOLATILITY_FAST   = "fast"
+    LABEL_VOLATILITY_SLOW   = "slow"
+    LABEL_VOLATILITY_STATIC = "static"
+
+LABEL_SLOW_INTERVAL   = 5     # seconds between polls of slow labels
+LABEL_STATIC_INTERVAL = 60    # safety net for static labels
+LABEL_DEMOTE_POLLS    = 10    # unchanged polls until an auto label turns slow
+
+# changes whenever a different item starts playing, invalidates all
+# cached labels
+INFOLABEL_PLAYBACK_FINGERPRINT = "$INFO[Player.FilenameAndPath]"
+
+# window and focused control in a single query, see HasNavigationChanged()
+INFOLABEL_NAVIGATION_FINGERPRINT = "$INFO[System.CurrentWindow]|$INFO[System.CurrentControl]"
+
+class InfoLabelCacheEntry():
+    def __init__(self):
+        self.value = ""
+        self.timePolled = 0.0
+        self.unchanged = 0
+        self.slow = False
 
 class InfoLabels():
 
@@ -45,14 +80,237 @@ class InfoLabels():
         self._nav_oldsubmenu = ""
         self._navtimer = time.time()
 
+        # frame snapshot, see BeginFrame()
+        self._frameActive = False
+        self._frameLabels = {}
+        self._frameBools = {}
+        self._frameWindowID = None
+        self._frameHits = 0
+        self._frameMisses = 0
+        self._compositeFallbacks = 0
+
+        # per label template cache for slow and static labels
+        self._labelCache = {}
+        self._playbackFingerprint = None
+        self._navigationFingerprint = None
+        self._labelPolls = 0
+        self._labelCacheHits = 0
+
+        # System.Time and System.Date without asking Kodi
+        self._clock = SystemClock()
+
+    ########
+    # BeginFrame()/EndFrame():
+    # everything queried in between is asked from Kodi only once, a rendered
+    # frame then is a consistent snapshot and repeated lookups stay in Python.
+    # With bReuseSnapshot set, the previous frame's snapshot is used again and
+    # only what it lacks is asked from Kodi.
+    def BeginFrame(self, bReuseSnapshot=False):
+        self._frameActive = True
+
+        if bReuseSnapshot:
+            return
+
+        self._frameLabels.clear()
+        self._frameBools.clear()
+        self._frameWindowID = None
+
+    def EndFrame(self):
+        self._frameActive = False
+
+    # returns (hits, misses), misses being actual calls into Kodi
+    def GetFrameCacheStats(self):
+        return (self._frameHits, self._frameMisses)
+
     def GetInfoLabel(self, strLabel):
-        return xbmc.getInfoLabel(strLabel)
+        if not self._frameActive:
+            return xbmc.getInfoLabel(strLabel)
+
+        try:
+            ret = self._frameLabels[strLabel]
+            self._frameHits += 1
+        except KeyError:
+            ret = self._frameLabels[strLabel] = xbmc.getInfoLabel(strLabel)
+            self._frameMisses += 1
+
+        return ret
 
     def GetBool(self, strBool):
-        return xbmc.getCondVisibility(strBool)
+        if not self._frameActive:
+            return xbmc.getCondVisibility(strBool)
+
+        try:
+            ret = self._frameBools[strBool]
+            self._frameHits += 1
+        except KeyError:
+            ret = self._frameBools[strBool] = xbmc.getCondVisibility(strBool)
+            self._frameMisses += 1
+
+        return ret
+
+    ########
+    # IsCompositeSafe():
+    # checks if a label template gives the same result when evaluated as
+    # part of a composite label
+    def IsCompositeSafe(self, strLabel):
+        if INFOLABEL_COMPOSITE_SEPARATOR in strLabel:
+            return False
+
+        if "$" not in strLabel and INFOLABEL_BARE_TAG_REGEX.match(strLabel):
+            return False
+
+        return True
+
+    def MakeCompositeLabel(self, listLabels):
+        return INFOLABEL_COMPOSITE_SEPARATOR.join(listLabels)
+
+    ########
+    # GetCompositeInfoLabels():
+    # evaluates a composite label of iCount templates with a single call into
+    # Kodi, returns None if the results can't be told apart (some label value
+    # contained the separator) and the templates must be evaluated one by one
+    def GetCompositeInfoLabels(self, strComposite, iCount):
+        listResults = self.GetInfoLabel(strComposite).split(INFOLABEL_COMPOSITE_SEPARATOR)
+
+        if len(listResults) != iCount:
+            self._compositeFallbacks += 1
+            return None
+
+        return listResults
+
+    def GetCompositeFallbackCount(self):
+        return self._compositeFallbacks
+
+    ########
+    # GetLabels():
+    # evaluates a list of label templates, returns the list of values. Every
+    # template has a volatility (LABEL_VOLATILITY), fast ones are evaluated
+    # on every call, slow and static ones only every LABEL_SLOW_INTERVAL or
+    # LABEL_STATIC_INTERVAL seconds or after InvalidateLabelCache(). Auto
+    # templates without any info label are static, the others start out
+    # fast and turn slow after LABEL_DEMOTE_POLLS unchanged polls if
+    # bAutoDemote is set, until their value changes again. Everything due is
+    # evaluated with a single composite label where possible.
+    def GetLabels(self, listTemplates, listVolatility, bAutoDemote):
+        now = time.time()
+        listEntries = []
+        listDue = []
+        bHaveCached = False
+
+        for i in range(len(listTemplates)):
+            strTemplate = listTemplates[i]
+
+            entry = self._labelCache.get(strTemplate)
+            if entry is None:
+                entry = self._labelCache[strTemplate] = InfoLabelCacheEntry()
+
+            listEntries.append(entry)
+
+            volatility = listVolatility[i]
+            if volatility == LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO:
+                if "$" not in strTemplate and self.IsCompositeSafe(strTemplate):
+                    volatility = LABEL_VOLATILITY.LABEL_VOLATILITY_STATIC
+                elif entry.slow and bAutoDemote:
+                    volatility = LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW
+                else:
+                    volatility = LABEL_VOLATILITY.LABEL_VOLATILITY_FAST
+
+            if volatility == LABEL_VOLATILITY.LABEL_VOLATILITY_FAST:
+                listDue.append(i)
+                continue
+
+            bHaveCached = True
+
+            if volatility == LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW:
+                interval = LABEL_SLOW_INTERVAL
+            else:
+                interval = LABEL_STATIC_INTERVAL
+
+            if (now - entry.timePolled) >= interval:
+                listDue.append(i)
+            else:
+                self._labelCacheHits += 1
+
+        # a different item started playing, nothing cached is valid anymore
+        if bHaveCached:
+            listValues = self.EvaluateLabels(listTemplates, listDue, [INFOLABEL_PLAYBACK_FINGERPRINT])
+
+            strFingerprint = listValues.pop()
+            if self._playbackFingerprint != strFingerprint:
+                self._playbackFingerprint = strFingerprint
+
+                listStale = [i for i in range(len(listTemplates)) if i not in listDue]
+                self._labelCacheHits -= len(listStale)
+                listValues = listValues + self.EvaluateLabels(listTemplates, listStale, [])
+                listDue = listDue + listStale
+        else:
+            listValues = self.EvaluateLabels(listTemplates, listDue, [])
+
+        for i, value in zip(listDue, listValues):
+            entry = listEntries[i]
+            entry.timePolled = now
+
+            if entry.value == value:
+                entry.unchanged += 1
+                if entry.unchanged >= LABEL_DEMOTE_POLLS:
+                    entry.slow = True
+            else:
+                entry.value = value
+                entry.unchanged = 0
+                entry.slow = False
+
+        self._labelPolls += len(listDue)
+
+        return [entry.value for entry in listEntries]
+
+    # evaluates the given templates plus the extra ones, returns their values
+    # in the same order
+    def EvaluateLabels(self, listTemplates, listIndices, listExtra):
+        listLabels = [self._clock.SubstituteLabels(listTemplates[i]) for i in listIndices] + listExtra
+        listValues = [None] * len(listLabels)
+
+        # nothing left for Kodi once the clock labels are filled in
+        for i in range(len(listIndices)):
+            if "$" not in listLabels[i] and listLabels[i] != listTemplates[listIndices[i]]:
+                listValues[i] = listLabels[i]
+
+        listSafe = [i for i in range(len(listLabels)) if listValues[i] is None and self.IsCompositeSafe(listLabels[i])]
+
+        # nothing to save with less than two labels
+        if len(listSafe) >= 2:
+            listComposite = self.GetCompositeInfoLabels(self.MakeCompositeLabel([listLabels[i] for i in listSafe]), len(listSafe))
+
+            if listComposite is not None:
+                for i, value in zip(listSafe, listComposite):
+                    listValues[i] = value
+
+        for i in range(len(listLabels)):
+            if listValues[i] is None:
+                listValues[i] = self.GetInfoLabel(listLabels[i])
+
+        return listValues
+
+    # makes all slow and static labels due on their next evaluation, e.g. on
+    # mode changes
+    def InvalidateLabelCache(self):
+        for entry in self._labelCache.values():
+            entry.timePolled = 0.0
+
+    # returns (polled, served from cache)
+    def GetLabelCacheStats(self):
+        return (self._labelPolls, self._labelCacheHits)
 
     def GetActiveWindowID(self):
-        return int(xbmcgui.getCurrentWindowId())
+        if not self._frameActive:
+            return int(xbmcgui.getCurrentWindowId())
+
+        if self._frameWindowID is None:
+            self._frameWindowID = int(xbmcgui.getCurrentWindowId())
+            self._frameMisses += 1
+        else:
+            self._frameHits += 1
+
+        return self._frameWindowID
 
     def timeToSecs(self, timeAr):
         # initialise return
@@ -90,10 +348,9 @@ class InfoLabels():
         return self.GetBool("PVR.IsPlayingRadio")
 
     def GetSystemTime(self):
-        # apply some split magic for 12h format here, as "hh:mm:ss"
-        # makes up for format guessing inside XBMC - fix for post-frodo at
-        # https://github.com/xbmc/xbmc/pull/2321
-        ret = self.GetInfoLabel("System.Time(%s)" % self._settings.getSysTimeFormat()).split(" ")[0]
+        # formatted locally like System.Time(format) would be, the split
+        # magic stays for formats carrying a meridiem
+        ret = self._clock.GetTime(self._settings.getSysTimeFormat()).split(" ")[0]
         return ret[-8:]
 
     def GetPlayerTime(self):
@@ -190,9 +447,23 @@ class InfoLabels():
                 self._navtimer = time.time()
             self._nav_oldmenu = menu
             self._nav_oldsubmenu = subMenu
+            self._navigationFingerprint = menu + "|" + subMenu
 
         return ret
 
+    ########
+    # HasNavigationChanged():
+    # cheap check for menu movement between frames, Kodi has no event for
+    # it. Changes already seen by IsNavigationActive() don't count.
+    def HasNavigationChanged(self):
+        strFingerprint = xbmc.getInfoLabel(INFOLABEL_NAVIGATION_FINGERPRINT)
+
+        if strFingerprint == self._navigationFingerprint:
+            return False
+
+        self._navigationFingerprint = strFingerprint
+        return True
+
     def IsWindowIDPVR(self, iWindowID):
         if iWindowID >= WINDOW_IDS.WINDOW_PVR and iWindowID <= WINDOW_IDS.WINDOW_PVR_MAX:
             return True
@@ -21,7 +21,9 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
+import hashlib
 import os
+import pickle
 import re
 import shutil
 import time
@@ -36,10 +38,49 @@ from .common import *
 from .settings import *
 from .extraicons import *
 from .infolabels import *
+from .lcdtemplate import *
+from .lrucache import *
 from .charset_hd44780 import *
 
 __lcdxml__        = xbmcvfs.translatePath(os.path.join("special://masterprofile", "LCD.xml"))
 __lcddefaultxml__ = xbmcvfs.translatePath(os.path.join(KODI_ADDON_ROOTPATH, "resources", "LCD.xml.defaults"))
+__lcdlayoutcache__ = os.path.join(KODI_ADDON_PROFILE, "layoutcache.pickle")
+
+# without Kodi events and anything changing by itself, render this often
+LCD_IDLE_RENDER_INTERVAL = 5
+
+# ticks per second during playback or idle, enough for clocks and play time
+LCD_STEADY_REFRESH_RATE = 1.0
+
+# ticks per second for play time if the sub-second setting is enabled
+LCD_PLAYTIME_REFRESH_RATE = 2.0
+
+# info labels showing the wall clock, the date or play time, e.g.
+# $INFO[System.Time], $INFO[System.Date] or $INFO[Player.TimeRemaining], also
+# as bare info tag like "Player.Time"
+g_reTimeLabel = re.compile(r'(?:\$INFO\[|^)\s*(?:System\.(?:Time|Date)|Player\.(?:Time|TimeRemaining|FinishTime)|PVR\.EpgEvent(?:ElapsedTime|RemainingTime))\b', flags=re.IGNORECASE)
+g_rePlayTimeLabel = re.compile(r'(?:\$INFO\[|^)\s*(?:Player\.(?:Time|TimeRemaining)|PVR\.EpgEvent(?:ElapsedTime|RemainingTime))\b', flags=re.IGNORECASE)
+
+# seconds a clock-only frame may go on with Kodi's state from an earlier
+# frame, see IsClockOnly()
+LCD_SNAPSHOT_MAX_AGE = 30
+
+# seconds between checks of LCD.xml for modifications
+LCD_LAYOUT_CHECK_INTERVAL = 2
+
+# version of what SaveLayoutCache() stores, caches of other versions are
+# ignored
+LCD_LAYOUT_CACHE_FORMAT = 2
+
+# everything LoadSkin() sets up besides the modes, stored in the layout cache
+g_listLayoutMembers = ["m_extraBars", "m_bAllowEmptyLines", "m_bCenterBigDigits", "m_bDisablePlayIndicatorOnPause",
+                       "m_bProgressbarSurroundings", "m_bProgressbarBlank", "m_iIconTextOffset", "m_strScrollSeparator"]
+
+# number of distinct labels StripBBCode() remembers
+LCD_BBCODE_CACHE_SIZE = 64
+
+# opening ([B], [COLOR red]) or closing ([/B]) BBCode tag
+g_reBBCodeTag = re.compile(r'\[(?:/([0-9a-zA-Z_\-]+)|([0-9a-zA-Z_\-]+)[0-9a-zA-Z_\- ]*)\]')
 
 class LCD_MODE:
   LCD_MODE_GENERAL     = 0
@@ -54,11 +95,12 @@ class LCD_MODE:
   LCD_MODE_MAX         = 9
 
 class LCD_LINETYPE:
-  LCD_LINETYPE_TEXT         = "text"
-  LCD_LINETYPE_PROGRESS     = "progressbar"
-  LCD_LINETYPE_PROGRESSTIME = "progresstime"
-  LCD_LINETYPE_ICONTEXT     = "icontext"
-  LCD_LINETYPE_BIGSCREEN    = "bigscreen"
+  LCD_LINETYPE_TEXT         = 0
+  LCD_LINETYPE_PROGRESS     = 1
+  LCD_LINETYPE_PROGRESSTIME = 2
+  LCD_LINETYPE_ICONTEXT     = 3
+  LCD_LINETYPE_BIGSCREEN    = 4
+  LCD_LINETYPE_MAX          = 5
 
 class LCD_LINEALIGN:
   LCD_LINEALIGN_LEFT   = 0
@@ -67,20 +109,63 @@ class LCD_LINEALIGN:
 
 g_dictEmptyLineDescriptor = {}
 g_dictEmptyLineDescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_TEXT
-g_dictEmptyLineDescriptor['startx'] = int(0)
+g_dictEmptyLineDescriptor['source'] = str("")
 g_dictEmptyLineDescriptor['text'] = str("")
-g_dictEmptyLineDescriptor['endx'] = int(0)
 g_dictEmptyLineDescriptor['align'] = LCD_LINEALIGN.LCD_LINEALIGN_LEFT
+g_dictEmptyLineDescriptor['volatility'] = LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO
+g_dictEmptyLineDescriptor['template'] = LcdLineTemplate("")
+
+# A layout line compiled for the current display geometry and settings, see
+# LcdBase.CompileRenderPlan()
+class LcdRenderLine():
+  __slots__ = ("m_iType", "m_iAlign", "m_iStartX", "m_iEndX", "m_iMaxLineLen", "m_strText", "m_bstrText")
+
+  def __init__(self, iType, iAlign, iStartX, iEndX, strText):
+    self.m_iType = iType
+    self.m_iAlign = iAlign
+    self.m_iStartX = iStartX
+    self.m_iEndX = iEndX
+    self.m_iMaxLineLen = iEndX - (iStartX - 1)
+    self.m_strText = strText
+    self.m_bstrText = b""
+
+# used to blank display rows not covered by the mode's lines
+g_EmptyRenderLine = LcdRenderLine(LCD_LINETYPE.LCD_LINETYPE_TEXT, LCD_LINEALIGN.LCD_LINEALIGN_LEFT, 0, 0, "")
+
+# Everything RenderFrame() needs to know about a mode that doesn't change
+# from frame to frame
+class LcdRenderPlan():
+  __slots__ = ("m_listLines", "m_dictLiteralLabels", "m_listLabelLines", "m_listLabelTexts", "m_listLabelVolatilities", "m_bBigScreen", "m_bSelfUpdating",
+               "m_bShowsTime", "m_bShowsPlayTime")
+
+  def __init__(self):
+    self.m_listLines = []
+    self.m_dictLiteralLabels = {}   # line index -> text for lines without Kodi labels
+    self.m_listLabelLines = []      # line indices that need Kodi
+    self.m_listLabelTexts = []
+    self.m_listLabelVolatilities = []
+    self.m_bBigScreen = False
+    self.m_bSelfUpdating = False
+    self.m_bShowsTime = False       # ticks get aligned to wall clock seconds
+    self.m_bShowsPlayTime = False
 
 class LcdBase():
   def __init__(self, settings):
     # configuration vars (from LCD.xml)
     self.m_lcdMode = [None] * LCD_MODE.LCD_MODE_MAX
+    self.m_iLastLabelMode = None
+    self.m_iLastRenderMode = None
+    self.m_timeLastRender = 0.0
+    self.m_timeLastSnapshot = 0.0
+    self.m_bClockOnly = False
+    self.m_iSnapshotReuses = 0
+    self.m_listRenderPlans = [None] * LCD_MODE.LCD_MODE_MAX
     self.m_extraBars = [None] * (LCD_EXTRABARS_MAX + 1)
     self.m_bAllowEmptyLines = False
     self.m_bCenterBigDigits = False
     self.m_bDisablePlayIndicatorOnPause = False
     self.m_bProgressbarSurroundings = False
+    self.m_bProgressbarBlank = " "
     self.m_iDimOnPlayDelay = 0
     self.m_iIconTextOffset = 2
     self.m_strLCDEncoding = "iso-8859-1" # LCDproc default is iso-8859-1!
@@ -93,12 +178,14 @@ class LcdBase():
     self.m_bVolumeChangeActive = False
     self.m_bWasStopped = True
     self.m_bXMLWarningDisplayed = False
+    self.m_layoutSignature = None     # see GetLayoutSignature(), None if no layout loaded
+    self.m_timeLayoutCheck = time.time()
     self.m_iOldAudioChannelsVar = 0
     self.m_strOldAudioCodec = ""
     self.m_strOldVideoCodec = ""
 
-    # regex compile cache
-    self.m_reBBCode = None
+    # labels with BBCode -> stripped text
+    self.m_BBCodeCache = LRUCache(LCD_BBCODE_CACHE_SIZE)
 
     # class instances
     self.m_Settings = settings
@@ -106,6 +193,9 @@ class LcdBase():
     # initialize InfoLabels
     self.m_InfoLabels = InfoLabels(self.m_Settings)
 
+    # see UpdateRefreshRate()
+    self.m_fRefreshRate = float(self.m_Settings.getRefreshRate())
+
 # @abstractmethod
   def _concrete_method(self):
     pass
@@ -135,7 +225,7 @@ class LcdBase():
     pass
 
 # @abstractmethod
-  def SetBigDigits(self, strTimeString, bForceUpdate):
+  def SetBigDigits(self, strTimeString):
     pass
 
 # @abstractmethod
@@ -143,7 +233,7 @@ class LcdBase():
     pass
 
 # @abstractmethod
-  def SetLine(self, mode, iLine, strLine, dictDescriptor, bForce):
+  def SetLine(self, mode, iLine, strLine, line):
     pass
 
 # @abstractmethod
@@ -200,21 +290,162 @@ class LcdBase():
     except:
       log(LOGERROR, "Failed to register custom HD44780-ROM pseudocodepage, expect problems with alternative charsets!")
 
-    # make sure we got reasonable defaults for users who didn't adapt to newest additions
-    bGotDefaultSkin = self.LoadSkin(__lcddefaultxml__, True)
+    # the parsed layout is kept across reconnects as long as the files
+    # didn't change
+    if self.m_layoutSignature is None or self.m_layoutSignature != self.GetLayoutSignature():
+      if not self.LoadLayout():
+        return False
+    else:
+      log(LOGDEBUG, "Reusing already loaded layout")
+
+    # force-update GUI settings, this also has the render plans recompiled for
+    # the (possibly changed) display geometry
+    self.UpdateGUISettings()
+
+    # first frame of a session is always rendered
+    self.m_iLastRenderMode = None
+
+    self.m_bCurrentlyDimmed = False
+    return True
+
+  def LoadLayout(self):
+    timeStart = time.time()
 
     # check for user-LCD.xml, optionally create it
     bSkinHandled = self.ManageLCDXML()
 
+    # taken before parsing, changes made meanwhile cause another reload
+    layoutSignature = self.GetLayoutSignature()
+    layoutCacheKey = self.GetLayoutCacheKey(layoutSignature)
+
+    if self.LoadLayoutCache(layoutCacheKey):
+      self.m_layoutSignature = layoutSignature
+      log(LOGINFO, "Layout loaded from cache in %.1f ms" % ((time.time() - timeStart) * 1000))
+      return True
+
+    # make sure we got reasonable defaults for users who didn't adapt to newest additions
+    bGotDefaultSkin = self.LoadSkin(__lcddefaultxml__, True)
+
     # try to load user setup
-    if not self.LoadSkin(__lcdxml__, False) and not bGotDefaultSkin:
+    bGotUserSkin = self.LoadSkin(__lcdxml__, False)
+
+    if not bGotUserSkin and not bGotDefaultSkin:
       log(LOGERROR, "No usable mode configuration/skin could be loaded, check your addon installation!")
       return False
 
-    # force-update GUI settings
-    self.UpdateGUISettings()
+    # a broken LCD.xml has to be reported again on next start
+    if bGotDefaultSkin and bGotUserSkin:
+      self.SaveLayoutCache(layoutCacheKey)
 
-    self.m_bCurrentlyDimmed = False
+    self.m_layoutSignature = layoutSignature
+    log(LOGINFO, "Layout parsed in %.1f ms" % ((time.time() - timeStart) * 1000))
+    return True
+
+  # GetLayoutCacheKey():
+  # a cached layout is valid for the same file contents, display geometry
+  # and addon version only
+  def GetLayoutCacheKey(self, layoutSignature):
+    listHashes = []
+
+    for strPath, mtime, size in layoutSignature:
+      try:
+        with open(strPath, "rb") as f:
+          listHashes.append(hashlib.sha1(f.read()).hexdigest())
+      except (IOError, OSError):
+        listHashes.append(None)
+
+    return (LCD_LAYOUT_CACHE_FORMAT, KODI_ADDON_VERSION, self.GetColumns(), self.GetRows(), layoutSignature, tuple(listHashes))
+
+  def LoadLayoutCache(self, layoutCacheKey):
+    if not os.path.isfile(__lcdlayoutcache__):
+      return False
+
+    try:
+      with open(__lcdlayoutcache__, "rb") as f:
+        # key first, so outdated layouts aren't even unpickled
+        if pickle.load(f) != layoutCacheKey:
+          log(LOGDEBUG, "Layout cache is outdated")
+          return False
+
+        dictLayout = pickle.load(f)
+
+      # only the line texts are cached, their descriptors are compiled anew
+      lcdMode = []
+      for listLines in dictLayout["m_lcdMode"]:
+        lcdMode.append([self.CompileLineDescriptor(strSource, volatility) for strSource, volatility in listLines])
+
+      dictMembers = {}
+      for strMember in g_listLayoutMembers:
+        dictMembers[strMember] = dictLayout[strMember]
+    except:
+      log(LOGWARNING, "Ignoring unreadable layout cache %s" % (__lcdlayoutcache__))
+      return False
+
+    self.Reset()
+
+    self.m_lcdMode = lcdMode
+    for strMember in g_listLayoutMembers:
+      setattr(self, strMember, dictMembers[strMember])
+
+    return True
+
+  def SaveLayoutCache(self, layoutCacheKey):
+    dictLayout = {}
+
+    dictLayout["m_lcdMode"] = []
+    for listDescriptors in self.m_lcdMode:
+      dictLayout["m_lcdMode"].append([(descriptor['source'], descriptor['volatility']) for descriptor in listDescriptors])
+
+    for strMember in g_listLayoutMembers:
+      dictLayout[strMember] = getattr(self, strMember)
+
+    strTempFile = __lcdlayoutcache__ + ".tmp"
+
+    try:
+      if not os.path.isdir(KODI_ADDON_PROFILE):
+        os.makedirs(KODI_ADDON_PROFILE)
+
+      with open(strTempFile, "wb") as f:
+        pickle.dump(layoutCacheKey, f)
+        pickle.dump(dictLayout, f)
+
+      os.replace(strTempFile, __lcdlayoutcache__)
+    except:
+      log(LOGWARNING, "Failed to write layout cache %s" % (__lcdlayoutcache__))
+
+  # GetLayoutSignature():
+  # identifies the current state of the layout files by path, mtime and size
+  def GetLayoutSignature(self):
+    signature = []
+
+    for strPath in [__lcddefaultxml__, __lcdxml__]:
+      try:
+        stat = os.stat(strPath)
+        signature.append((strPath, stat.st_mtime, stat.st_size))
+      except OSError:
+        signature.append((strPath, None, None))
+
+    return tuple(signature)
+
+  # CheckLayoutChanged():
+  # called regularly, reloads the layout when LCD.xml was edited meanwhile,
+  # returns True if that happened
+  def CheckLayoutChanged(self):
+    if self.m_layoutSignature is None or (self.m_timeLayoutCheck + LCD_LAYOUT_CHECK_INTERVAL) > time.time():
+      return False
+
+    self.m_timeLayoutCheck = time.time()
+
+    if self.GetLayoutSignature() == self.m_layoutSignature:
+      return False
+
+    log(LOGINFO, "Layout files changed, reloading")
+
+    if not self.LoadLayout():
+      return False
+
+    # the next frame shows the new layout in any case
+    self.m_iLastRenderMode = None
     return True
 
   def UpdateGUISettings(self):
@@ -228,6 +459,8 @@ class LcdBase():
 
     self.m_iDimOnPlayDelay = self.m_Settings.getDimDelay()
 
+    self.InvalidateRenderPlans()
+
   def LoadSkin(self, xmlFile, doReset):
     if doReset == True:
       self.Reset()
@@ -381,15 +614,12 @@ class LcdBase():
 
       return
 
-    # regex to determine any of $INFO[LCD.Time(Wide)21-44]
-    timeregex = r'' + re.escape('$INFO[LCD.') + 'Time((Wide)?\d?\d?)' + re.escape(']')
-
     for line in node.findall("line"):
-      # initialize line with empty descriptor
-      linedescriptor = g_dictEmptyLineDescriptor.copy()
-
-      linedescriptor['startx'] = int(1)
-      linedescriptor['endx'] = int(self.GetColumns())
+      # optional hint on how often the line's labels change
+      volatility = line.get("volatility", LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO).strip().lower()
+      if volatility not in [LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO, LABEL_VOLATILITY.LABEL_VOLATILITY_FAST, LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW, LABEL_VOLATILITY.LABEL_VOLATILITY_STATIC]:
+        log(LOGWARNING, "Unknown line volatility '%s' in mode %d, using auto" % (volatility, mode))
+        volatility = LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO
 
       if line.text == None:
         linetext = ""
@@ -397,64 +627,84 @@ class LcdBase():
         # prepare text line for XBMC's expected encoding
         linetext = line.text.strip()
 
-      # make sure linetext has something so re.match won't fail
-      if linetext != "":
-        timematch = re.match(timeregex, linetext, flags=re.IGNORECASE)
-
-        # if line matches, throw away mode, add BigDigit descriptor and end processing for this mode
-        if timematch != None:
-          linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN
-          linedescriptor['text'] = "Time"
-
-          self.m_lcdMode[mode] = []
-          self.m_lcdMode[mode].append(linedescriptor)
-          return
-
-      # progressbar line if InfoLabel exists
-      if linetext.lower().find("$info[lcd.progressbar]") >= 0:
-        linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_PROGRESS
-        linedescriptor['text'] = self.m_bProgressbarBlank * int(self.m_iColumns)
-        linedescriptor['endx'] = int(self.m_iCellWidth) * int(self.m_iColumns)
-
-        if self.m_bProgressbarSurroundings == True:
-          linedescriptor['startx'] = int(2)
-          linedescriptor['text'] = "[" + self.m_bProgressbarBlank * (self.m_iColumns - 2) + "]"
-          linedescriptor['endx'] = int(self.m_iCellWidth) * (int(self.GetColumns()) - 2)
-
-      # progresstime line if InfoLabel exists
-      elif linetext.lower().find("$info[lcd.progresstime]") >= 0:
-        linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME
-        linedescriptor['endx'] = int(self.m_iCellWidth) * int(self.m_iColumns)
-
-      # textline with icon in front
-      elif linetext.lower().find("$info[lcd.playicon]") >= 0:
-        linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_ICONTEXT
-        linedescriptor['startx'] = int(1 + self.m_iIconTextOffset) # icon widgets take 2 chars, so shift text offset (default: 2)
-        linedescriptor['text'] = re.sub(r'\s?' + re.escape("$INFO[LCD.PlayIcon]") + '\s?', ' ', linetext, flags=re.IGNORECASE).strip()
-
-      # standard (scrolling) text line
-      else:
-        linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_TEXT
-        linedescriptor['text'] = linetext
+      linedescriptor = self.CompileLineDescriptor(linetext, volatility)
 
-      # check for alignment pseudo-labels
-      if linetext.lower().find("$info[lcd.aligncenter]") >= 0:
-        linedescriptor['align'] = LCD_LINEALIGN.LCD_LINEALIGN_CENTER
-      if linetext.lower().find("$info[lcd.alignright]") >= 0:
-        linedescriptor['align'] = LCD_LINEALIGN.LCD_LINEALIGN_RIGHT
+      log(LOGDEBUG, "Mode %d line %d: %r" % (mode, len(self.m_lcdMode[mode]), linedescriptor['template']))
 
-      linedescriptor['text'] = re.sub(r'\s?' + re.escape("$INFO[LCD.AlignCenter]") + '\s?', ' ', linedescriptor['text'], flags=re.IGNORECASE).strip()
-      linedescriptor['text'] = re.sub(r'\s?' + re.escape("$INFO[LCD.AlignRight]") + '\s?', ' ', linedescriptor['text'], flags=re.IGNORECASE).strip()
+      # if line starts with $INFO[LCD.Time(Wide)21-44], throw away mode, add BigDigit descriptor and end processing for this mode
+      if linedescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN:
+        self.m_lcdMode[mode] = []
+        self.m_lcdMode[mode].append(linedescriptor)
+        return
 
       self.m_lcdMode[mode].append(linedescriptor)
 
+  # CompileLineDescriptor():
+  # line descriptor for a line of LCD.xml, also used to restore the modes
+  # from the layout cache
+  def CompileLineDescriptor(self, linetext, volatility):
+    # initialize line with empty descriptor
+    linedescriptor = g_dictEmptyLineDescriptor.copy()
+    linedescriptor['source'] = linetext
+    linedescriptor['volatility'] = volatility
+
+    # split into literal text, Kodi labels and our own LCD.* pseudo labels
+    template = LcdLineTemplate(linetext)
+    linedescriptor['template'] = template
+
+    # $INFO[LCD.Time(Wide)21-44] at the start makes the whole mode a BigDigit clock
+    if template.IsBigDigitClock():
+      linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN
+      linedescriptor['text'] = "Time"
+      linedescriptor['template'] = LcdLineTemplate("Time")
+      return linedescriptor
+
+    # progressbar line if InfoLabel exists (geometry dependent parts are
+    # set up in CompileRenderLine())
+    if template.HasToken("lcd.progressbar"):
+      linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_PROGRESS
+
+    # progresstime line if InfoLabel exists
+    elif template.HasToken("lcd.progresstime"):
+      linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME
+
+    # textline with icon in front
+    elif template.HasToken("lcd.playicon"):
+      linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_ICONTEXT
+      linedescriptor['text'] = template.GetKodiLabel()
+
+    # standard (scrolling) text line
+    else:
+      linedescriptor['type'] = LCD_LINETYPE.LCD_LINETYPE_TEXT
+      linedescriptor['text'] = template.GetKodiLabel()
+
+    # check for alignment pseudo-labels
+    if template.HasToken("lcd.aligncenter"):
+      linedescriptor['align'] = LCD_LINEALIGN.LCD_LINEALIGN_CENTER
+    if template.HasToken("lcd.alignright"):
+      linedescriptor['align'] = LCD_LINEALIGN.LCD_LINEALIGN_RIGHT
+
+    return linedescriptor
+
   def Reset(self):
     for i in range(0,LCD_MODE.LCD_MODE_MAX):
       self.m_lcdMode[i] = []			#clear list
 
+    self.m_iLastLabelMode = None
+    self.InvalidateRenderPlans()
+
   def Shutdown(self):
     log(LOGINFO, "Shutting down")
 
+    iHits, iMisses = self.m_InfoLabels.GetFrameCacheStats()
+    log(LOGDEBUG, "InfoLabel frame cache statistics: %i hits, %i queries passed to Kodi, %i composite label fallbacks, %i clock-only frames without a new snapshot" % (iHits, iMisses, self.m_InfoLabels.GetCompositeFallbackCount(), self.m_iSnapshotReuses))
+
+    iPolled, iCached = self.m_InfoLabels.GetLabelCacheStats()
+    log(LOGDEBUG, "Line label statistics: %i evaluated, %i served from the slow/static label cache" % (iPolled, iCached))
+
+    iHits, iMisses = self.m_BBCodeCache.GetStats()
+    log(LOGDEBUG, "BBCode strip cache statistics: %i hits, %i misses" % (iHits, iMisses))
+
     if self.m_Settings.getDimOnShutdown():
       self.SetBackLight(0)
 
@@ -490,77 +740,314 @@ class LcdBase():
 
     return ret
 
+  # StripBBCode():
+  # removes all matching pairs of BBCode tags, tags without counterpart are
+  # kept as they are
   def StripBBCode(self, strtext):
-    regexbbcode = "\[(?P<tagname>[0-9a-zA-Z_\-]+?)[0-9a-zA-Z_\- ]*?\](?P<content>.*?)\[\/(?P=tagname)\]"
-    # precompile and remember regex to make sure re's caching won't cause accidential recompilation
-    if not self.m_reBBCode:
-      self.m_reBBCode = re.compile(regexbbcode)
-      # catch+report failure
-      if not self.m_reBBCode:
-        log(LOGWARNING, "Precompilation of BBCode strip regex failed")
-        self.m_reBBCode = regexbbcode
-
-    # loop to catch nested tags
-    loopcount = 5
-
-    # start with passed string
-    mangledline = strtext
-
-    # do regex multiple times to catch nested tags
-    while True:
-      loopcount = loopcount - 1
-      try:
-        mangledline, replacements = re.subn(self.m_reBBCode, "\g<content>", mangledline)
-      except:
-        return mangledline
+    if "[" not in strtext:
+      return strtext
+
+    # titles, artists etc. stay the same for a long time
+    strStripped = self.m_BBCodeCache.Get(strtext)
+    if strStripped is None:
+      strStripped = self.StripBBCodeTags(strtext)
+      self.m_BBCodeCache.Put(strtext, strStripped)
+
+    return strStripped
+
+  def StripBBCodeTags(self, strtext):
+    listOpen = []   # (tagname, start, end) of not yet closed tags
+    listStrip = []  # (start, end) of tags to remove
+
+    # single scan, closing tags pair with the innermost open tag of the same
+    # name which takes care of nesting
+    for match in g_reBBCodeTag.finditer(strtext):
+      if match.group(2) is not None:
+        listOpen.append((match.group(2), match.start(), match.end()))
+        continue
+
+      for i in range(len(listOpen) - 1, -1, -1):
+        if listOpen[i][0] == match.group(1):
+          listStrip.append(listOpen[i][1:])
+          listStrip.append((match.start(), match.end()))
+          del listOpen[i]
+          break
+
+    if len(listStrip) == 0:
+      return strtext
+
+    listStrip.sort()
+
+    listParts = []
+    iPos = 0
+    for iStart, iEnd in listStrip:
+      listParts.append(strtext[iPos:iStart])
+      iPos = iEnd
+    listParts.append(strtext[iPos:])
+
+    return "".join(listParts)
+
+  # CompileRenderLine():
+  # turns a line descriptor from LCD.xml into a LcdRenderLine for the current
+  # geometry and settings
+  def CompileRenderLine(self, descriptor):
+    iType = descriptor['type']
+    iColumns = self.GetColumns()
+
+    if iType == LCD_LINETYPE.LCD_LINETYPE_PROGRESS:
+      if self.m_bProgressbarSurroundings == True:
+        line = LcdRenderLine(iType, descriptor['align'], 2, int(self.m_iCellWidth) * (iColumns - 2), "[" + self.m_bProgressbarBlank * (iColumns - 2) + "]")
+      else:
+        line = LcdRenderLine(iType, descriptor['align'], 1, int(self.m_iCellWidth) * iColumns, self.m_bProgressbarBlank * iColumns)
+
+      line.m_bstrText = line.m_strText.encode(self.m_strLCDEncoding)
+    elif iType == LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME:
+      line = LcdRenderLine(iType, descriptor['align'], 1, int(self.m_iCellWidth) * iColumns, descriptor['text'])
+    elif iType == LCD_LINETYPE.LCD_LINETYPE_ICONTEXT:
+      # icon widgets take 2 chars, so shift text offset (default: 2)
+      line = LcdRenderLine(iType, descriptor['align'], 1 + self.m_iIconTextOffset, iColumns, descriptor['text'])
+    else:
+      line = LcdRenderLine(iType, descriptor['align'], 1, iColumns, descriptor['text'])
+
+    return line
+
+  # CompileRenderPlan():
+  # precomputes the per-mode data RenderFrame() and GetModeLabels() work with
+  def CompileRenderPlan(self, mode):
+    plan = LcdRenderPlan()
+
+    for i in range(len(self.m_lcdMode[mode])):
+      descriptor = self.m_lcdMode[mode][i]
+      line = self.CompileRenderLine(descriptor)
+
+      plan.m_listLines.append(line)
+
+      bTimeLabel = g_reTimeLabel.search(line.m_strText) is not None
+
+      # anything that changes without Kodi telling about it (clocks, play
+      # time, progress bars)
+      if line.m_iType != LCD_LINETYPE.LCD_LINETYPE_TEXT or bTimeLabel:
+        plan.m_bSelfUpdating = True
+
+      # big digits show either the clock or the play time
+      bShowsTime = False
+      if line.m_iType in (LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME, LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN):
+        bShowsTime = True
+        plan.m_bShowsPlayTime = True
+      elif line.m_iType != LCD_LINETYPE.LCD_LINETYPE_PROGRESS and not descriptor['template'].IsLiteral() and bTimeLabel:
+        bShowsTime = True
+        if g_rePlayTimeLabel.search(line.m_strText):
+          plan.m_bShowsPlayTime = True
+
+      plan.m_bShowsTime = plan.m_bShowsTime or bShowsTime
+
+      if line.m_iType in (LCD_LINETYPE.LCD_LINETYPE_PROGRESS, LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME):
+        continue
+
+      # plain text needs no help from Kodi
+      if descriptor['template'].IsLiteral():
+        plan.m_dictLiteralLabels[i] = line.m_strText
+        continue
+
+      volatility = descriptor['volatility']
+
+      # an HH:MM clock stays the same for many polls, but must not be demoted
+      # or the new minute would show up seconds late
+      if bShowsTime and volatility == LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO:
+        volatility = LABEL_VOLATILITY.LABEL_VOLATILITY_FAST
 
-      # when the result didn't change, all tags should be gone (but also stop if maxnum iterations are reached)
-      if replacements == 0 or loopcount < 1:
-        break
+      plan.m_listLabelLines.append(i)
+      plan.m_listLabelTexts.append(line.m_strText)
+      plan.m_listLabelVolatilities.append(volatility)
 
-    # return last replace mangling
-    return mangledline
+    plan.m_bBigScreen = len(plan.m_listLines) > 0 and plan.m_listLines[0].m_iType == LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN
 
-  def Render(self, bForce):
+    return plan
+
+  def GetRenderPlan(self, mode):
+    if self.m_listRenderPlans[mode] is None:
+      self.m_listRenderPlans[mode] = self.CompileRenderPlan(mode)
+
+    return self.m_listRenderPlans[mode]
+
+  # layout, geometry or settings changed, plans get recompiled on next use
+  def InvalidateRenderPlans(self):
+    self.m_listRenderPlans = [None] * LCD_MODE.LCD_MODE_MAX
+
+  # GetModeLabels():
+  # evaluates the text lines of a mode, slow ones only when due (see
+  # InfoLabels.GetLabels()), returns a dict line index -> label
+  def GetModeLabels(self, mode):
+    plan = self.GetRenderPlan(mode)
+    dictLabels = dict(plan.m_dictLiteralLabels)
+
+    # all caches start over when the mode changes
+    if mode != self.m_iLastLabelMode:
+      self.m_iLastLabelMode = mode
+      self.m_InfoLabels.InvalidateLabelCache()
+
+    # navigation must follow user input immediately, only explicitly slow
+    # lines are polled less often there
+    bAutoDemote = mode != LCD_MODE.LCD_MODE_NAVIGATION
+
+    listLabels = self.m_InfoLabels.GetLabels(plan.m_listLabelTexts, plan.m_listLabelVolatilities, bAutoDemote)
+
+    dictLabels.update(zip(plan.m_listLabelLines, listLabels))
+
+    return dictLabels
+
+  # IsModeSelfUpdating():
+  # checks if a mode shows anything that changes without Kodi telling about
+  # it (clocks, play time, progress bars)
+  def IsModeSelfUpdating(self, mode):
+    return self.GetRenderPlan(mode).m_bSelfUpdating
+
+  # IsShowingTime():
+  # tells if the last rendered mode shows the wall clock or play time, the
+  # service loop then ticks on wall clock second boundaries
+  def IsShowingTime(self):
+    if self.m_iLastRenderMode is None:
+      return False
+
+    return self.GetRenderPlan(self.m_iLastRenderMode).m_bShowsTime
+
+  # NeedsRender():
+  # tells if the regular tick has to render a frame when no Kodi event
+  # arrived: the display shows a clock or playback, navigation is going on
+  # or nothing was rendered for LCD_IDLE_RENDER_INTERVAL seconds. The
+  # navigation display is rendered on every tick, so it goes away as soon as
+  # the navigation timeout is over.
+  def NeedsRender(self):
+    if self.m_iLastRenderMode in (None, LCD_MODE.LCD_MODE_NAVIGATION) or self.IsModeSelfUpdating(self.m_iLastRenderMode):
+      return True
+
+    if (self.m_timeLastRender + LCD_IDLE_RENDER_INTERVAL) <= time.time():
+      return True
+
+    return self.m_InfoLabels.IsNavigationActive() or self.m_InfoLabels.IsPlayerPlaying()
+
+  # menu movement since the last frame, see InfoLabels.HasNavigationChanged()
+  def HasNavigationChanged(self):
+    return self.m_InfoLabels.HasNavigationChanged()
+
+  # how often the service loop should tick right now, see UpdateRefreshRate()
+  def GetRefreshRate(self):
+    return self.m_fRefreshRate
+
+  # UpdateRefreshRate():
+  # determines the tick rate while rendering a frame: the configured rate
+  # while the user navigates or a volume/notification dialog is up, once per
+  # second otherwise (or twice per second for play time, if enabled) and even
+  # less with the backlight dimmed, unless the time is shown
+  def UpdateRefreshRate(self):
+    fMaxRate = float(self.m_Settings.getRefreshRate())
+    plan = self.GetRenderPlan(self.m_iLastRenderMode)
+
+    if not self.m_Settings.getAdaptiveRefresh():
+      self.m_fRefreshRate = fMaxRate
+    elif self.m_iLastRenderMode == LCD_MODE.LCD_MODE_NAVIGATION or self.m_InfoLabels.WindowIsActive(WINDOW_IDS.WINDOW_DIALOG_VOLUME_BAR) or self.m_InfoLabels.WindowIsActive(WINDOW_IDS.WINDOW_DIALOG_KAI_TOAST):
+      self.m_fRefreshRate = fMaxRate
+    # a dimmed screensaver clock still has to move on every second
+    elif self.m_bCurrentlyDimmed and not plan.m_bShowsTime:
+      self.m_fRefreshRate = min(self.m_Settings.getRefreshRateMin(), fMaxRate)
+    elif self.m_Settings.getSubSecondPlayTime() and self.m_InfoLabels.IsPlayerPlaying() and plan.m_bShowsPlayTime:
+      self.m_fRefreshRate = min(LCD_PLAYTIME_REFRESH_RATE, fMaxRate)
+    else:
+      self.m_fRefreshRate = min(LCD_STEADY_REFRESH_RATE, fMaxRate)
+
+  # IsClockOnly():
+  # tells if the frame just rendered showed nothing but the time: the
+  # screensaver's big digits with nothing playing. Anything else that might
+  # change then comes with a Kodi event (screensaver deactivated, playback
+  # started, ...), so the following ticks don't need a new snapshot of
+  # Kodi's state.
+  def IsClockOnly(self):
+    if self.m_iLastRenderMode != LCD_MODE.LCD_MODE_SCREENSAVER:
+      return False
+
+    plan = self.GetRenderPlan(self.m_iLastRenderMode)
+    if not plan.m_bShowsTime or len(plan.m_listLabelLines) > 0:
+      return False
+
+    return not self.m_InfoLabels.IsPlayerPlaying()
+
+  # something happened in Kodi, forget about cached labels
+  def InvalidateLabels(self):
+    self.m_InfoLabels.InvalidateLabelCache()
+
+  ########
+  # Render():
+  # renders a frame, all InfoLabels come from a single snapshot. A tick
+  # without any Kodi event since the last frame (bTickOnly) reuses that
+  # frame's snapshot if only the clock is shown, see IsClockOnly()
+  def Render(self, bTickOnly=False):
+    bReuseSnapshot = bTickOnly and self.m_bClockOnly and (time.time() - self.m_timeLastSnapshot) < LCD_SNAPSHOT_MAX_AGE
+
+    if bReuseSnapshot:
+      self.m_iSnapshotReuses += 1
+    else:
+      self.m_timeLastSnapshot = time.time()
+
+    self.m_InfoLabels.BeginFrame(bReuseSnapshot)
+
+    try:
+      self.RenderFrame()
+
+      # still within the frame, answered from its snapshot
+      self.m_bClockOnly = self.IsClockOnly()
+      self.UpdateRefreshRate()
+    finally:
+      self.m_InfoLabels.EndFrame()
+
+  def RenderFrame(self):
     outLine = 0
     inLine = 0
     mode = self.GetLCDMode()
 
+    self.m_iLastRenderMode = mode
+    self.m_timeLastRender = time.time()
+
     self.HandleBacklight(mode)
 
-    while (outLine < int(self.GetRows()) and inLine < len(self.m_lcdMode[mode])):
+    plan = self.GetRenderPlan(mode)
+    dictLabels = self.GetModeLabels(mode)
+    iRows = self.GetRows()
+
+    while (outLine < iRows and inLine < len(plan.m_listLines)):
+      line = plan.m_listLines[inLine]
+
       #parse the progressbar infolabel by ourselfs!
-      if self.m_lcdMode[mode][inLine]['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESS or self.m_lcdMode[mode][inLine]['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME:
+      if line.m_iType == LCD_LINETYPE.LCD_LINETYPE_PROGRESS or line.m_iType == LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME:
         # get playtime and duration and convert into seconds
         percent = self.m_InfoLabels.GetProgressPercent()
-        pixelsWidth = self.SetProgressBar(percent, self.m_lcdMode[mode][inLine]['endx'])
-        line = "p" + str(pixelsWidth)
+        pixelsWidth = self.SetProgressBar(percent, line.m_iEndX)
+        strLine = "p" + str(pixelsWidth)
       else:
-        if self.m_lcdMode[mode][inLine]['type'] == LCD_LINETYPE.LCD_LINETYPE_ICONTEXT:
+        if line.m_iType == LCD_LINETYPE.LCD_LINETYPE_ICONTEXT:
           self.SetPlayingStateIcon()
 
-        line = self.m_InfoLabels.GetInfoLabel(self.m_lcdMode[mode][inLine]['text'])
+        strLine = dictLabels[inLine]
 
-        if len(line) > 0:
-          line = self.StripBBCode(line)
+        if len(strLine) > 0:
+          strLine = self.StripBBCode(strLine)
 
         self.SetProgressBar(0, -1)
 
-      if self.m_bAllowEmptyLines or len(line) > 0:
-        self.SetLine(mode, outLine, line, self.m_lcdMode[mode][inLine], bForce)
+      if self.m_bAllowEmptyLines or len(strLine) > 0:
+        self.SetLine(mode, outLine, strLine, line)
         outLine += 1
 
       inLine += 1
 
     # fill remainder with empty space if not bigscreen
-    if self.m_lcdMode[mode][0]['type'] != LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN:
-      while outLine < int(self.GetRows()):
-        self.SetLine(mode, outLine, "", g_dictEmptyLineDescriptor, bForce)
+    if not plan.m_bBigScreen:
+      while outLine < iRows:
+        self.SetLine(mode, outLine, "", g_EmptyRenderLine)
         outLine += 1
 
     if self.m_cExtraIcons is not None:
       self.SetExtraInformation()
-      self.m_bstrSetLineCmds += self.m_cExtraIcons.GetOutputCommands()
+      self.m_FrameAssembler.Add(self.m_cExtraIcons.GetOutputCommands())
 
     self.FlushLines()
 
@@ -22,7 +22,7 @@
 '''
 
 import re
-import telnetlib
+import threading
 import time
 
 import xbmc
@@ -34,13 +34,32 @@ from .lcdbase import *
 
 from .lcdproc_extra_imon import *
 from .lcdproc_extra_mdm166a import *
+from .lcdproc_replies import *
+from .lcdproc_transport import *
+from .lcdproc_async import *
+from .lcdproc_frame import *
+from .lcdproc_writer import *
+from .lrucache import *
 
 from .infolabels import *
 
-MAX_ROWS = 20
-MAX_BIGDIGITS = 20
 INIT_RETRY_INTERVAL = 2
 INIT_RETRY_INTERVAL_MAX = 60
+REPLY_TIMEOUT = 3
+
+# number of distinct scroller texts whose wire payload is kept around
+PAYLOAD_CACHE_SIZE = 128
+
+# Widget names and command formats of a display row, built once per
+# connection in SetupScreen()
+class LCDprocRow():
+  __slots__ = ("m_bstrScrollerFmt", "m_bstrFixedTextFmt", "m_bstrProgressFmt", "m_bstrIconFmt")
+
+  def __init__(self, ln, iColumns):
+    self.m_bstrScrollerFmt = b"widget_set xbmc lineScroller%i %%i %i %i %i %%s %%i \"%%s\"\n" % (ln, ln, iColumns, ln)
+    self.m_bstrFixedTextFmt = b"widget_set xbmc lineScroller%i 1 %i %i %i m 1 \"%%s\"\n" % (ln, ln, iColumns, ln)
+    self.m_bstrProgressFmt = b"widget_set xbmc lineProgress%i %%i %i %%i\n" % (ln, ln)
+    self.m_bstrIconFmt = b"widget_set xbmc lineIcon%i 1 %i %%s\n" % (ln, ln)
 
 class LCDProc(LcdBase):
   def __init__(self, settings):
@@ -48,87 +67,107 @@ class LCDProc(LcdBase):
     self.m_lastInitAttempt = 0
     self.m_initRetryInterval = INIT_RETRY_INTERVAL
     self.m_used = True
-    self.tn = telnetlib.Telnet()
-    self.tnsocket = None
+    self.m_Transport = LCDprocTransport()
     self.m_timeLastSockAction = time.time()
     self.m_timeSocketIdleTimeout = 2
-    self.m_strLineText = [None]*MAX_ROWS
-    self.m_strLineType = [None]*MAX_ROWS
-    self.m_bstrLineIcon = [None]*MAX_ROWS
-    self.m_strDigits = [None]*MAX_BIGDIGITS
     self.m_iProgressBarWidth = 0
     self.m_iProgressBarLine = -1
     self.m_bstrIconName = b"BLOCK_FILLED"
     self.m_iBigDigits = int(8) # 12:45:78 / colons count as digit
-    self.m_iOffset = 1
-    self.m_bstrSetLineCmds = b""
+    self.m_FrameAssembler = LCDprocFrameAssembler()
     self.m_cExtraIcons = None
+    self.m_ReplyTracker = LCDprocReplyTracker()
+    self.m_ReplyReader = None
+    self.m_AsyncEngine = None
+    self.m_FrameQueue = LCDprocFrameQueue(FRAMEQUEUE_MAX_DEPTH)
+    self.m_FrameWriter = None
+    self.m_lockSend = threading.Lock()
+    self.m_listRows = []
+    self.m_iScrollDelay = 0
+    self.m_bstrScrollMode = b"m"
+    self.m_PayloadCache = LRUCache(PAYLOAD_CACHE_SIZE)
+
+    # SetLine() handlers, indexed by LCD_LINETYPE
+    self.m_listLineHandlers = [None] * LCD_LINETYPE.LCD_LINETYPE_MAX
+    self.m_listLineHandlers[LCD_LINETYPE.LCD_LINETYPE_TEXT] = self.SetLineText
+    self.m_listLineHandlers[LCD_LINETYPE.LCD_LINETYPE_PROGRESS] = self.SetLineProgress
+    self.m_listLineHandlers[LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME] = self.SetLineProgressTime
+    self.m_listLineHandlers[LCD_LINETYPE.LCD_LINETYPE_ICONTEXT] = self.SetLineIconText
+    self.m_listLineHandlers[LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN] = self.SetLineBigScreen
 
     LcdBase.__init__(self, settings)
 
   def SendCommand(self, strCmd, bCheckRet):
-    countcmds = strCmd.count(b'\n')
     sendcmd = strCmd
-    ret = True
 
     # Single command without lf
-    if countcmds < 1:
-      countcmds = 1
+    if strCmd.count(b'\n') < 1:
       sendcmd += b"\n"
 
-    try:
-      # Send to server via raw socket to prevent telnetlib tampering with
-      # certain chars (especially 0xFF -> telnet IAC)
-      self.tnsocket.sendall(sendcmd)
-    except:
-      # Something bad happened, abort
-      log(LOGERROR, "SendCommand: Telnet exception - send")
+    if self.IsConnectionLost():
       return False
 
+    # Account for the replies before sending, the reader might see them
+    # first. Both must happen atomically as the frame writer sends, too.
+    with self.m_lockSend:
+      try:
+        if self.m_AsyncEngine is not None:
+          # registered on the event loop, in line with the engine's keepalives
+          entries = self.m_ReplyTracker.CreateEntries(sendcmd, bCheckRet)
+          self.m_AsyncEngine.SendRegistered(sendcmd, entries)
+        else:
+          entries = self.m_ReplyTracker.Register(sendcmd, bCheckRet)
+          self.m_Transport.SendAll(sendcmd)
+      except:
+        # Something bad happened, abort
+        log(LOGERROR, "SendCommand: Socket exception - send")
+        return False
+
     # Update last socketaction timestamp
     self.m_timeLastSockAction = time.time()
 
-    # Repeat for number of found commands
-    for i in range(1, (countcmds + 1)):
-      # Read in (multiple) responses
-      while True:
-        try:
-          # Read server reply
-          reply = self.tn.read_until(b"\n",3)
-        except:
-          # (Re)read failed, abort
-          log(LOGERROR, "SendCommand: Telnet exception - reread")
-          return False
+    # No return checking desired, so don't wait for the replies, the reply
+    # reader will account for them in the background
+    if not bCheckRet:
+      return True
+
+    if not self.m_ReplyTracker.WaitFor(entries, REPLY_TIMEOUT):
+      if not entries[-1].m_evDone.is_set():
+        log(LOGERROR, "SendCommand: Timeout waiting for reply to '%s'" % (strCmd.decode(self.m_strLCDEncoding)))
+      return False
+
+    return True
+
+  def IsConnectionLost(self):
+    if self.m_AsyncEngine is not None:
+      return self.m_AsyncEngine.IsConnectionLost()
+
+    return self.m_ReplyReader is None or self.m_ReplyReader.IsConnectionLost()
 
-        # Skip these messages
-        if reply[:6] == b'listen':
-          continue
-        elif reply[:6] == b'ignore':
-          continue
-        elif reply[:3] == b'key':
-          continue
-        elif reply[:9] == b'menuevent':
-          continue
+  def StartReplyReader(self):
+    transport = self.m_Transport
 
-        # Response seems interesting, so stop here
-        break
+    def ReadReplyLine():
+      return transport.ReadLine(0.5)
 
-      if not bCheckRet:
-        continue # no return checking desired, so be fine
+    self.m_ReplyTracker.Reset()
+    self.m_ReplyReader = LCDprocReplyReader(ReadReplyLine, self.m_ReplyTracker)
+    self.m_ReplyReader.start()
 
-      if strCmd == b'noop' and reply == b'noop complete\n':
-        continue # noop has special reply
+  def StopReplyReader(self):
+    if self.m_ReplyReader is None:
+      return
 
-      if reply == b'success\n':
-        continue
+    self.m_ReplyReader.Stop()
+    self.m_ReplyTracker.FailAll()
 
-      ret = False
+    if self.m_ReplyReader is not threading.current_thread():
+      self.m_ReplyReader.join(1)
 
-    # Leave information something undesired happened
-    if ret is False:
-      log(LOGWARNING, "Reply to '%s' was '%s'" % (strCmd.decode(self.m_strLCDEncoding), reply.decode(self.m_strLCDEncoding)))
+    iOk, iFailed, iUnexpected, iPending = self.m_ReplyTracker.GetStats()
+    log(LOGDEBUG, "Reply statistics: %i ok, %i failed, %i unexpected, %i pending" % (iOk, iFailed, iUnexpected, iPending))
 
-    return ret
+    self.m_ReplyReader = None
 
   def SetupScreen(self):
     # Add screen first
@@ -144,57 +183,116 @@ class LCDProc(LcdBase):
       if not self.SendCommand(b"screen_set xbmc -heartbeat off", True):
         return False
 
-    # Initialize command list var
-    strInitCommandList = b""
+    # what the previous session displayed, if any
+    dictLastState = self.m_FrameAssembler.GetState()
+
+    # Widgets only get declared along with their reset state here, the frame
+    # assembler adds them to the screen once a frame actually uses them
+    self.m_FrameAssembler.ResetWidgets()
 
     # Setup widgets (scrollers and hbars first)
     for i in range(1,int(self.m_iRows)+1):
-      # Text widgets
-      strInitCommandList += b"widget_add xbmc lineScroller%i scroller\n" % (i)
+      # Text widgets, empty
+      self.m_FrameAssembler.DeclareWidget(b"xbmc", b"lineScroller%i" % (i), b"scroller", b"widget_set xbmc lineScroller%i 1 %i %i %i m 1 \"\"" % (i, i, self.m_iColumns, i))
 
-      # Progress bars
-      strInitCommandList += b"widget_add xbmc lineProgress%i hbar\n" % (i)
-
-      # Reset bars to zero
-      strInitCommandList += b"widget_set xbmc lineProgress%i 0 0 0\n" % (i)
-
-      self.m_strLineText[i-1] = ""
-      self.m_strLineType[i-1] = ""
+      # Progress bars, zero
+      self.m_FrameAssembler.DeclareWidget(b"xbmc", b"lineProgress%i" % (i), b"hbar", b"widget_set xbmc lineProgress%i 0 0 0" % (i))
 
     # Setup icons last
     for i in range(1,int(self.m_iRows)+1):
-      # Icons
-      strInitCommandList += b"widget_add xbmc lineIcon%i icon\n" % (i)
-
-      # Default icon
-      strInitCommandList += b"widget_set xbmc lineIcon%i 0 0 BLOCK_FILLED\n" % (i)
-
-      self.m_bstrLineIcon[i-1] = b""
+      self.m_FrameAssembler.DeclareWidget(b"xbmc", b"lineIcon%i" % (i), b"icon", b"widget_set xbmc lineIcon%i 0 0 BLOCK_FILLED" % (i))
 
     for i in range(1,int(self.m_iBigDigits + 1)):
-      # Big Digit
-      strInitCommandList += b"widget_add xbmc lineBigDigit%i num\n" % (i)
+      self.m_FrameAssembler.DeclareWidget(b"xbmc", b"lineBigDigit%i" % (i), b"num", b"widget_set xbmc lineBigDigit%i 0 0" % (i))
 
-      # Set Digit
-      strInitCommandList += b"widget_set xbmc lineBigDigit%i 0 0\n" % (i)
+    self.m_listRows = [LCDprocRow(i, self.m_iColumns) for i in range(1,int(self.m_iRows)+1)]
 
-      self.m_strDigits[i] = b""
+    # After a reconnect, the last displayed content goes out right away
+    self.m_FrameAssembler.Restore(dictLastState)
+    strInitCommandList = self.m_FrameAssembler.Pop()
+
+    if strInitCommandList == b"":
+      return True
 
     if not self.SendCommand(strInitCommandList, True):
       return False
 
     return True
 
+  def StartFrameWriter(self):
+    def SendFrame(bstrFrame):
+      self.SendCommand(bstrFrame, False)
+
+    self.m_FrameQueue.Clear()
+    self.m_FrameWriter = LCDprocFrameWriter(self.m_FrameQueue, SendFrame)
+    self.m_FrameWriter.start()
+
+  # with bDrain set, whatever is still queued (e.g. dimming the backlight on
+  # shutdown) gets sent first
+  def StopFrameWriter(self, bDrain=False):
+    if self.m_FrameWriter is None:
+      return
+
+    self.m_FrameWriter.Stop(bDrain)
+    self.m_FrameWriter.join(REPLY_TIMEOUT)
+    self.m_FrameQueue.Clear()
+
+    iWidgetsAdded, iWidgetsDeleted = self.m_FrameAssembler.GetWidgetCounts()
+    log(LOGDEBUG, "Frame writer statistics: %i frames sent, %i merged, %i commands coalesced, %i unchanged widget states skipped, %i widgets added, %i deleted" % (self.m_FrameWriter.GetSentCount(), self.m_FrameQueue.GetDropCount(), self.m_FrameAssembler.GetSupersededCount(), self.m_FrameAssembler.GetUnchangedCount(), iWidgetsAdded, iWidgetsDeleted))
+
+    self.m_FrameWriter = None
+
+  def SetupTransport(self):
+    bUseAsyncEngine = self.m_Settings.getUseAsyncEngine()
+
+    if bUseAsyncEngine == (self.m_AsyncEngine is not None):
+      return
+
+    self.CloseSocket()
+
+    if bUseAsyncEngine:
+      log(LOGINFO, "Using asyncio connection engine")
+      self.m_AsyncEngine = LCDprocAsyncEngine(self.m_ReplyTracker, self.m_timeSocketIdleTimeout)
+      self.m_Transport = self.m_AsyncEngine
+    else:
+      self.m_AsyncEngine.Shutdown()
+      self.m_AsyncEngine = None
+      self.m_Transport = LCDprocTransport()
+
+  # asynchronous connect in progress or its result not yet picked up
+  def IsConnecting(self):
+    if self.m_AsyncEngine is None:
+      return False
+
+    return self.m_AsyncEngine.IsConnecting() or self.m_AsyncEngine.HasConnectResult()
+
   def Initialize(self):
     connected = False
     if not self.m_used:
       return False#nothing to do
 
-    #don't try to initialize too often
-    now = time.time()
-    if (now - self.m_lastInitAttempt) < self.m_initRetryInterval:
+    # asynchronous connect still running, check back on the next call
+    if self.m_AsyncEngine is not None and self.m_AsyncEngine.IsConnecting():
       return False
-    self.m_lastInitAttempt = now
+
+    # a finished asynchronous connect gets picked up right away
+    if self.m_AsyncEngine is None or not self.m_AsyncEngine.HasConnectResult():
+      #don't try to initialize too often
+      now = time.time()
+      if (now - self.m_lastInitAttempt) < self.m_initRetryInterval:
+        return False
+      self.m_lastInitAttempt = now
+
+      self.SetupTransport()
+      self.m_Transport.SetDeadPeerTimeout(self.m_Settings.getDeadPeerTimeout())
+
+      # let the engine do the handshake in the background
+      if self.m_AsyncEngine is not None:
+        self.CloseSocket()
+        address = self.GetLCDdAddress()
+        log(LOGDEBUG,"Open " + FormatAddress(address))
+        self.m_AsyncEngine.BeginConnect(address)
+        return False
 
     if self.Connect():
       if LcdBase.Initialize(self):
@@ -220,7 +318,7 @@ class LCDProc(LcdBase):
 
     return connected
 
-  def DetermineExtraSupport(self):
+  def DetermineExtraSupport(self, reply):
     rematch_imon = "SoundGraph iMON(.*)LCD"
     rematch_mdm166a = "Targa(.*)mdm166a"
     rematch_imonvfd = "Soundgraph(.*)VFD"
@@ -229,15 +327,12 @@ class LCDProc(LcdBase):
 
     # Never cause script failure/interruption by this! This is totally optional!
     try:
-      # Retrieve driver name for additional functionality
-      self.tn.write(b"info\n")
-      reply = self.tn.read_until(b"\n",3).strip().decode("ascii")
-
       # When the LCDd driver doesn't supply a valid string, inform and return
-      if reply == "":
+      if reply is None or reply.strip() == b"":
         log(LOGINFO, "Empty driver information reply")
         return
 
+      reply = reply.strip().decode("ascii")
       log(LOGINFO, "Driver information reply: " + reply)
 
       if re.match(rematch_imon, reply):
@@ -263,20 +358,40 @@ class LCDProc(LcdBase):
     except:
       pass
 
+  # unix domain socket path or (host, port), whatever the settings select
+  def GetLCDdAddress(self):
+    if self.m_Settings.getUseUnixSocket():
+      return self.m_Settings.getSocketPath()
+
+    return (self.m_Settings.getHostIp(), self.m_Settings.getHostPort())
+
   def Connect(self):
-    self.CloseSocket()
+    address = self.GetLCDdAddress()
 
     try:
-      ip = self.m_Settings.getHostIp()
-      port = self.m_Settings.getHostPort()
-      log(LOGDEBUG,"Open " + str(ip) + ":" + str(port))
+      if self.m_AsyncEngine is not None:
+        # handshake was already done on the engine's event loop
+        reply, driverinfo = self.m_AsyncEngine.TakeConnectResult()
+      else:
+        self.CloseSocket()
+        log(LOGDEBUG,"Open " + FormatAddress(address))
 
-      self.tn.open(ip, port)
-      # Start a new session
-      self.tn.write(b"hello\n")
+        self.m_Transport.Open(address)
+        # Start a new session
+        self.m_Transport.SendAll(b"hello\n")
 
-      # Receive LCDproc data to determine row and column information
-      reply = self.tn.read_until(b"\n",3).decode("ascii")
+        # Receive LCDproc data to determine row and column information
+        reply = self.m_Transport.ReadLine(REPLY_TIMEOUT)
+
+        # Retrieve driver name for additional functionality
+        self.m_Transport.SendAll(b"info\n")
+        driverinfo = self.m_Transport.ReadLine(REPLY_TIMEOUT)
+
+      if reply is None:
+        log(LOGERROR, "Connect: Timeout waiting for LCDd greeting")
+        return False
+
+      reply = reply.decode("ascii")
       log(LOGDEBUG,"Reply: " + reply)
 
       # parse reply by regex
@@ -298,7 +413,7 @@ class LCDProc(LcdBase):
       self.m_iCellHeight = int(lcdinfo.group(5))
 
       # tell users what's going on
-      log(LOGINFO, "Connected to LCDd at %s:%s, Protocol version %s - Geometry %sx%s characters (%sx%s pixels, %sx%s pixels per character)" % (str(ip), str(port), float(lcdinfo.group(1)), str(self.m_iColumns), str(self.m_iRows), str(self.m_iColumns * self.m_iCellWidth), str(self.m_iRows * self.m_iCellHeight), str(self.m_iCellWidth), str(self.m_iCellHeight)))
+      log(LOGINFO, "Connected to LCDd at %s, Protocol version %s - Geometry %sx%s characters (%sx%s pixels, %sx%s pixels per character)" % (FormatAddress(address), float(lcdinfo.group(1)), str(self.m_iColumns), str(self.m_iRows), str(self.m_iColumns * self.m_iCellWidth), str(self.m_iRows * self.m_iCellHeight), str(self.m_iCellWidth), str(self.m_iCellHeight)))
 
       # Set up BigNum values based on display geometry
       if self.m_iColumns < 13:
@@ -312,17 +427,19 @@ class LCDProc(LcdBase):
 
       # Check LCDproc if we can enable any extras or override values
       # (might override e.g. m_iBigDigits!)
-      self.DetermineExtraSupport()
+      self.DetermineExtraSupport(driverinfo)
 
     except:
       log(LOGERROR,"Connect: Caught exception, aborting.")
       return False
 
-    # retrieve raw socket object
-    self.tnsocket = self.tn.get_socket()
-    if self.tnsocket is None:
-      log(LOGERROR, "Retrieval of socket object failed!")
-      return False
+    # from here on, all replies are handled by the reply reader (or the
+    # engine's event loop)
+    if self.m_AsyncEngine is None:
+      self.StartReplyReader()
+
+    # rendered frames are sent by the frame writer
+    self.StartFrameWriter()
 
     if not self.SetupScreen():
       log(LOGERROR, "Screen setup failed!")
@@ -331,7 +448,12 @@ class LCDProc(LcdBase):
     return True
 
   def CloseSocket(self):
-    if self.tnsocket:
+    # make sure no more frames get sent while disconnecting, queued ones go
+    # out first if LCDd is still there
+    self.StopFrameWriter(self.m_Transport.IsOpen() and not self.IsConnectionLost())
+    self.m_FrameAssembler.Clear()
+
+    if self.m_Transport.IsOpen():
       # no pyexceptions, please, we're disconnecting anyway
       try:
         # if we served extra elements, (try to) reset them
@@ -340,37 +462,72 @@ class LCDProc(LcdBase):
             log(LOGERROR, "CloseSocket(): Cannot clear extra icons")
 
         # do gracefully disconnect (send directly as we won't get any response on this)
-        self.tn.write(b"bye\n")
-        # and close socket afterwards
-        self.tn.close()
+        self.m_Transport.SendAll(b"bye\n")
       except:
         # exception caught on this, so what? :)
         pass
 
+    # stop reply processing and close socket afterwards
+    if self.m_ReplyReader is not None:
+      self.m_ReplyReader.Stop()
+
+    self.m_Transport.Close()
+    self.StopReplyReader()
+
     # delete/cleanup extra support instance
     del self.m_cExtraIcons
     self.m_cExtraIcons = None
 
-    self.tnsocket = None
-    del self.tn
-    self.tn = telnetlib.Telnet()
-
   def IsConnected(self):
-    if not self.tnsocket:
+    if not self.m_Transport.IsOpen():
+      return False
+
+    # handshake done, but not yet picked up by Initialize()
+    if self.IsConnecting():
+      return False
+
+    # reply reader noticed connection loss
+    if self.IsConnectionLost():
+      log(LOGERROR, "Connection to LCDd lost in IsConnected(), aborting!")
       return False
 
-    # Ping only every SocketIdleTimeout seconds
-    if (self.m_timeLastSockAction + self.m_timeSocketIdleTimeout) > time.time():
+    # the engine watches the connection by itself
+    if self.m_AsyncEngine is not None:
       return True
 
-    if not self.SendCommand(b"noop", True):
-      log(LOGERROR, "noop failed in IsConnected(), aborting!")
+    # e.g. keepalive probes went unanswered
+    if self.m_Transport.HasSocketError():
+      log(LOGERROR, "Socket error in IsConnected(), aborting!")
       return False
 
+    # LCDd replies to every command, overdue replies mean it's gone
+    iDeadPeerTimeout = self.m_Settings.getDeadPeerTimeout()
+    if self.m_ReplyTracker.GetOldestPendingAge() > iDeadPeerTimeout:
+      log(LOGERROR, "No reply from LCDd within %i seconds in IsConnected(), aborting!" % (iDeadPeerTimeout))
+      return False
+
+    # Nothing written for SocketIdleTimeout seconds, keep replies flowing
+    if (self.m_timeLastSockAction + self.m_timeSocketIdleTimeout) <= time.time():
+      self.SendKeepalive()
+
     return True
 
+  # queue commands behind the frames already waiting without waiting for
+  # their replies, the reply tracker logs failures and notices replies that
+  # never arrive
+  def QueueCommand(self, bstrCmds):
+    self.m_timeLastSockAction = time.time()
+
+    if self.m_FrameWriter is not None:
+      self.m_FrameQueue.Put(bstrCmds)
+    else:
+      self.SendCommand(bstrCmds, False)
+
+  def SendKeepalive(self):
+    self.QueueCommand(b"noop\n")
+
   def SetBackLight(self, iLight):
-    if not self.tnsocket:
+    if not self.m_Transport.IsOpen():
       return
     log(LOGDEBUG, "Switch Backlight to: " + str(iLight))
 
@@ -381,9 +538,16 @@ class LCDProc(LcdBase):
       cmd = b"screen_set xbmc -backlight on\n"
 
     # Send to server
-    if not self.SendCommand(cmd, True):
-      log(LOGERROR, "SetBackLight(): Cannot change backlight state")
-      self.CloseSocket()
+    self.QueueCommand(cmd)
+
+  def Shutdown(self):
+    iHits, iMisses = self.m_PayloadCache.GetStats()
+    log(LOGDEBUG, "Line payload cache statistics: %i hits, %i misses" % (iHits, iMisses))
+
+    LcdBase.Shutdown(self)
+
+    if self.m_AsyncEngine is not None:
+      self.m_AsyncEngine.Shutdown()
 
   def SetContrast(self, iContrast):
     #TODO: Not sure if you can control contrast from client
@@ -394,28 +558,24 @@ class LCDProc(LcdBase):
     self.m_bStop = True
 
   def Suspend(self):
-    if self.m_bStop or not self.tnsocket:
+    if self.m_bStop or not self.m_Transport.IsOpen():
       return
 
     # Build command to suspend screen
     cmd = b"screen_set xbmc -priority hidden\n"
 
     # Send to server
-    if not self.SendCommand(cmd, True):
-      log(LOGERROR, "Suspend(): Cannot suspend")
-      self.CloseSocket()
+    self.QueueCommand(cmd)
 
   def Resume(self):
-    if self.m_bStop or not self.tnsocket:
+    if self.m_bStop or not self.m_Transport.IsOpen():
       return
 
     # Build command to resume screen
     cmd = b"screen_set xbmc -priority info\n"
 
     # Send to server
-    if not self.SendCommand(cmd, True):
-      log(LOGERROR, "Resume(): Cannot resume")
-      self.CloseSocket()
+    self.QueueCommand(cmd)
 
   def GetColumns(self):
     return int(self.m_iColumns)
@@ -437,11 +597,10 @@ class LCDProc(LcdBase):
 
       return ret
 
-  def SetBigDigits(self, strTimeString, bForceUpdate):
+  def SetBigDigits(self, strTimeString):
     iOffset = 1
     iDigitCount = 1
     iStringOffset = 0
-    strRealTimeString = ""
 
     if strTimeString == "" or strTimeString == None:
       return
@@ -457,21 +616,14 @@ class LCDProc(LcdBase):
       iStringOffset = len(strTimeString) - self.m_iBigDigits
       iOffset = 1;
 
-    if self.m_iOffset != iOffset:
-      # on offset change force redraw
-      bForceUpdate = True
-      self.m_iOffset = iOffset
-
+    # unused digits keep their reset state
     for i in range(int(iStringOffset), int(iStringLength)):
-      if self.m_strDigits[iDigitCount] != strTimeString[i] or bForceUpdate:
-        self.m_strDigits[iDigitCount] = strTimeString[i]
-
-        if strTimeString[i] == ":":
-          self.m_bstrSetLineCmds += b"widget_set xbmc lineBigDigit%i %i 10\n" % (iDigitCount, iOffset)
-        elif strTimeString[i].isdigit():
-          self.m_bstrSetLineCmds += b"widget_set xbmc lineBigDigit%i %i %s\n" % (iDigitCount, iOffset, strTimeString[i].encode(self.m_strLCDEncoding))
-        else:
-          self.m_bstrSetLineCmds += b"widget_set xbmc lineBigDigit%i 0 0\n" % (iDigitCount)
+      if strTimeString[i] == ":":
+        self.m_FrameAssembler.Add(b"widget_set xbmc lineBigDigit%i %i 10\n" % (iDigitCount, iOffset))
+      elif strTimeString[i].isdigit():
+        self.m_FrameAssembler.Add(b"widget_set xbmc lineBigDigit%i %i %s\n" % (iDigitCount, iOffset, strTimeString[i].encode(self.m_strLCDEncoding)))
+      else:
+        self.m_FrameAssembler.Add(b"widget_set xbmc lineBigDigit%i 0 0\n" % (iDigitCount))
 
       if strTimeString[i] == ":":
         iOffset += 1
@@ -480,13 +632,6 @@ class LCDProc(LcdBase):
 
       iDigitCount += 1
 
-    while iDigitCount <= self.m_iBigDigits:
-      if self.m_strDigits[iDigitCount] != "" or bForceUpdate:
-        self.m_strDigits[iDigitCount] = ""
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineBigDigit%i 0 0\n" % (iDigitCount)
-
-      iDigitCount += 1
-
   def SetProgressBar(self, percent, pxWidth):
     self.m_iProgressBarWidth = int(float(percent) * pxWidth)
     return self.m_iProgressBarWidth
@@ -511,134 +656,122 @@ class LCDProc(LcdBase):
   def GetRows(self):
     return int(self.m_iRows)
 
-  def ClearBigDigits(self, fullredraw = True):
-    for i in range(1,int(self.m_iBigDigits + 1)):
-      # Clear Digit
-      if fullredraw:
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineBigDigit%i 0 0\n" % (i)
-      self.m_strDigits[i] = ""
-
-    # on full redraw, make sure all widget get redrawn by resetting their type
-    if fullredraw:
-      for i in range(0, int(self.GetRows())):
-        self.m_strLineType[i] = ""
-        self.m_strLineText[i] = ""
-        self.m_bstrLineIcon[i] = b""
+  def UpdateGUISettings(self):
+    strOldEncoding = self.m_strLCDEncoding
 
-  def ClearLine(self, iLine):
-    self.m_bstrSetLineCmds += b"widget_set xbmc lineIcon%i 0 0 BLOCK_FILLED\n" % (iLine)
-    self.m_bstrSetLineCmds += b"widget_set xbmc lineProgress%i 0 0 0\n" % (iLine)
-    self.m_bstrSetLineCmds += b"widget_set xbmc lineScroller%i 1 %i %i %i m 1 \"\"\n" % (iLine, iLine, self.m_iColumns, iLine)
-
-  def SetLine(self, mode, iLine, strLine, dictDescriptor, bForce):
-    if self.m_bStop or not self.tnsocket:
-      return
+    LcdBase.UpdateGUISettings(self)
 
-    if iLine < 0 or iLine >= int(self.m_iRows):
-      return
+    # cached payloads are encoded with the old charset
+    if self.m_strLCDEncoding != strOldEncoding:
+      self.m_PayloadCache.Clear()
 
-    plTime = self.m_InfoLabels.GetPlayerTime()
-    plDuration = self.m_InfoLabels.GetPlayerDuration()
-    ln = iLine + 1
-    bExtraForce = False
-    drawLineText = False
+    self.m_iScrollDelay = self.m_Settings.getScrollDelay()
+    self.m_bstrScrollMode = self.m_Settings.getLCDprocScrollMode().encode(self.m_strLCDEncoding)
 
-    if self.m_strLineType[iLine] != dictDescriptor['type']:
-      if dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN:
-        self.ClearDisplay()
-      else:
-        if self.m_strLineType[iLine] == LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN:
-          self.ClearBigDigits()
-        else:
-          self.ClearLine(int(iLine + 1))
+    self.m_FrameAssembler.SetDeleteUnused(self.m_Settings.getDeleteUnusedWidgets())
 
-      self.m_strLineType[iLine] = dictDescriptor['type']
-      bExtraForce = True
+  def ClearBigDigits(self):
+    for i in range(1,int(self.m_iBigDigits + 1)):
+      self.m_FrameAssembler.ResetWidget(b"xbmc", b"lineBigDigit%i" % (i))
 
-      if dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESS and dictDescriptor['text'] != "":
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineScroller%i 1 %i %i %i m 1 \"%s\"\n" % (ln, ln, self.m_iColumns, ln, dictDescriptor['text'].encode(self.m_strLCDEncoding))
+  def ClearLine(self, iLine):
+    self.m_FrameAssembler.ResetWidget(b"xbmc", b"lineIcon%i" % (iLine))
+    self.m_FrameAssembler.ResetWidget(b"xbmc", b"lineProgress%i" % (iLine))
+    self.m_FrameAssembler.ResetWidget(b"xbmc", b"lineScroller%i" % (iLine))
+
+  # Everything not set here stays in its reset state for this frame, and only
+  # what differs from the display's current state gets sent
+  def SetLine(self, mode, iLine, strLine, line):
+    if self.m_bStop or not self.m_Transport.IsOpen():
+      return
 
-      if dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME and dictDescriptor['text'] != "":
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineScroller%i 1 %i %i %i m 1 \"%s\"\n" % (ln, ln, self.m_iColumns, ln, dictDescriptor['text'].encode(self.m_strLCDEncoding))
+    if iLine < 0 or iLine >= len(self.m_listRows):
+      return
 
-    if dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN:
-      strLineLong = self.GetBigDigitTime(mode)
-    elif dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME:
-      strLineLong = plTime + self.m_bProgressbarBlank * (self.m_iColumns - len(plTime) - len(plDuration)) + plDuration
-    else:
-      strLineLong = strLine
+    self.m_listLineHandlers[line.m_iType](mode, self.m_listRows[iLine], strLine, line)
 
-    strLineLong.strip()
+  # scroller text, either scrolling or cut off if it doesn't fit
+  def SetScrollerText(self, row, iStartX, strLineLong, iMaxLineLen):
+    # empty lines look the same as the scroller's reset state
+    if strLineLong == "":
+      return
 
-    iMaxLineLen = dictDescriptor['endx'] - (int(dictDescriptor['startx']) - 1)
-    iScrollSpeed = self.m_Settings.getScrollDelay()
-    bstrScrollMode = self.m_Settings.getLCDprocScrollMode().encode(self.m_strLCDEncoding)
+    iScrollSpeed = self.m_iScrollDelay
 
     if len(strLineLong) > iMaxLineLen: # if the string doesn't fit the display...
       if iScrollSpeed != 0:            # add separator when scrolling enabled
-        if bstrScrollMode == b"m":     # and scrollmode is marquee
+        if self.m_bstrScrollMode == b"m":     # and scrollmode is marquee
           strLineLong += self.m_strScrollSeparator
       else:                                       # or cut off
         strLineLong = strLineLong[:iMaxLineLen]
         iScrollSpeed = 1
 
-    iStartX = dictDescriptor['startx']
-
-    # check if update is required
-    if strLineLong != self.m_strLineText[iLine] or bForce:
-      # bigscreen
-      if dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_BIGSCREEN:
-        self.SetBigDigits(strLineLong, bExtraForce)
-      # progressbar line
-      elif dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESS:
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineProgress%i %i %i %i\n" % (ln, iStartX, ln, self.m_iProgressBarWidth)
-      # progressbar line with time
-      elif dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_PROGRESSTIME:
-        drawLineText = True
-        pLenFract = float(self.m_iColumns - int(len(plDuration) + len(plTime))) / self.m_iColumns
-        pTimeLen = int(self.m_iProgressBarWidth * pLenFract)
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineProgress%i %i %i %i\n" % (ln, iStartX + len(plTime), ln, pTimeLen)
-      # everything else (text, icontext)
-      else:
-        drawLineText = True
-        if len(strLineLong) < iMaxLineLen and dictDescriptor['align'] != LCD_LINEALIGN.LCD_LINEALIGN_LEFT:
-          iSpaces = iMaxLineLen - len(strLineLong)
-          if dictDescriptor['align'] == LCD_LINEALIGN.LCD_LINEALIGN_RIGHT:
-            iStartX += iSpaces
-          elif dictDescriptor['align'] == LCD_LINEALIGN.LCD_LINEALIGN_CENTER:
-            iStartX += int(iSpaces / 2)
+    self.m_FrameAssembler.Add(row.m_bstrScrollerFmt % (iStartX, self.m_bstrScrollMode, iScrollSpeed, self.GetLinePayload(strLineLong)))
 
-      if drawLineText:
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineScroller%i %i %i %i %i %s %i \"%s\"\n" % (ln, iStartX, ln, self.m_iColumns, ln, bstrScrollMode, iScrollSpeed, re.escape(strLineLong.encode(self.m_strLCDEncoding, errors="replace")))
+  # GetLinePayload():
+  # scroller text encoded and quoted for LCDd, lines alternating between a
+  # few states (channel/title, playlist entries) are served from the cache
+  def GetLinePayload(self, strLine):
+    bstrPayload = self.m_PayloadCache.Get(strLine)
 
-      # cache contents
-      self.m_strLineText[iLine] = strLineLong
+    if bstrPayload is None:
+      bstrPayload = QuoteLCDdString(strLine.encode(self.m_strLCDEncoding, errors="replace"))
+      self.m_PayloadCache.Put(strLine, bstrPayload)
 
-    if dictDescriptor['type'] == LCD_LINETYPE.LCD_LINETYPE_ICONTEXT:
-      if self.m_bstrLineIcon[iLine] != self.m_bstrIconName or bExtraForce:
-        self.m_bstrLineIcon[iLine] = self.m_bstrIconName
+    return bstrPayload
 
-        self.m_bstrSetLineCmds += b"widget_set xbmc lineIcon%i 1 %i %s\n" % (ln, ln, self.m_bstrIconName)
+  # everything else (text, icontext)
+  def SetLineText(self, mode, row, strLine, line):
+    iStartX = line.m_iStartX
 
-  def ClearDisplay(self):
-    log(LOGDEBUG, "Clearing display contents")
+    if line.m_iAlign != LCD_LINEALIGN.LCD_LINEALIGN_LEFT and len(strLine) < line.m_iMaxLineLen:
+      iSpaces = line.m_iMaxLineLen - len(strLine)
+      if line.m_iAlign == LCD_LINEALIGN.LCD_LINEALIGN_RIGHT:
+        iStartX += iSpaces
+      elif line.m_iAlign == LCD_LINEALIGN.LCD_LINEALIGN_CENTER:
+        iStartX += int(iSpaces / 2)
 
-    # clear line buffer first
-    self.FlushLines()
+    self.SetScrollerText(row, iStartX, strLine, line.m_iMaxLineLen)
 
-    # set all widgets to empty stuff and/or offscreen
-    for i in range(1,int(self.m_iRows)+1):
-      self.ClearLine(i)
+  def SetLineIconText(self, mode, row, strLine, line):
+    self.SetLineText(mode, row, strLine, line)
+    self.m_FrameAssembler.Add(row.m_bstrIconFmt % (self.m_bstrIconName))
+
+  # progressbar line
+  def SetLineProgress(self, mode, row, strLine, line):
+    if line.m_bstrText != b"":
+      self.m_FrameAssembler.Add(row.m_bstrFixedTextFmt % (QuoteLCDdString(line.m_bstrText)))
+
+    self.m_FrameAssembler.Add(row.m_bstrProgressFmt % (line.m_iStartX, self.m_iProgressBarWidth))
+
+  # progressbar line with time
+  def SetLineProgressTime(self, mode, row, strLine, line):
+    plTime = self.m_InfoLabels.GetPlayerTime()
+    plDuration = self.m_InfoLabels.GetPlayerDuration()
+
+    pLenFract = float(self.m_iColumns - int(len(plDuration) + len(plTime))) / self.m_iColumns
+    pTimeLen = int(self.m_iProgressBarWidth * pLenFract)
+    self.m_FrameAssembler.Add(row.m_bstrProgressFmt % (line.m_iStartX + len(plTime), pTimeLen))
 
-    # add commands to clear big digits
-    self.ClearBigDigits()
+    strLineLong = plTime + self.m_bProgressbarBlank * (self.m_iColumns - len(plTime) - len(plDuration)) + plDuration
+    self.SetScrollerText(row, line.m_iStartX, strLineLong, line.m_iMaxLineLen)
 
-    # send to display
-    self.FlushLines()
+  # bigscreen
+  def SetLineBigScreen(self, mode, row, strLine, line):
+    self.SetBigDigits(self.GetBigDigitTime(mode))
+
+  def ClearDisplay(self):
+    log(LOGDEBUG, "Clearing display contents")
+
+    # set all widgets back to their reset state for the current frame
+    self.m_FrameAssembler.ResetAll()
 
   def FlushLines(self):
-      if len(self.m_bstrSetLineCmds) > 0:
-        # Send complete command package
-        self.SendCommand(self.m_bstrSetLineCmds, False)
+      bstrFrame = self.m_FrameAssembler.Pop()
 
-        self.m_bstrSetLineCmds = b""
+      if len(bstrFrame) > 0:
+        # Hand over complete command package to the frame writer
+        if self.m_FrameWriter is not None:
+          self.m_FrameQueue.Put(bstrFrame)
+        else:
+          self.SendCommand(bstrFrame, False)
@@ -0,0 +1,271 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lcdproc_async.py: asyncio based LCDd connection engine,
+                                    runs on a private event loop thread
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import asyncio
+import threading
+import time
+
+from .common import *
+from .lcdproc_transport import TRANSPORT_CONNECT_TIMEOUT, TRANSPORT_DEADPEER_TIMEOUT, IsUnixSocketAddress, EnableTcpKeepalive
+from .scheduler import DeadlineScheduler
+
+ASYNC_REPLY_TIMEOUT = 3
+ASYNC_CLOSE_TIMEOUT = 1
+
+# Drop-in replacement for LCDprocTransport plus LCDprocReplyReader: the
+# connection handshake, command streaming, reply reading and noop keepalive
+# all run as coroutines, the caller only ever queues command batches.
+class LCDprocAsyncEngine():
+  def __init__(self, tracker, keepaliveInterval):
+    self.m_Tracker = tracker
+    self.m_fKeepaliveInterval = keepaliveInterval
+    self.m_iDeadPeerTimeout = TRANSPORT_DEADPEER_TIMEOUT
+    self.m_loop = None
+    self.m_thread = None
+    self.m_futConnect = None
+    self.m_reader = None
+    self.m_writer = None
+    self.m_queueSend = None
+    self.m_tasks = []
+    self.m_bConnectionLost = False
+    self.m_timeLastWrite = time.time()
+
+  def Start(self):
+    if self.m_thread is not None:
+      return
+
+    self.m_loop = asyncio.new_event_loop()
+    self.m_thread = threading.Thread(target=self.RunLoop, name="LCDprocAsyncEngine")
+    self.m_thread.daemon = True
+    self.m_thread.start()
+
+  def RunLoop(self):
+    asyncio.set_event_loop(self.m_loop)
+    self.m_loop.run_forever()
+    self.m_loop.close()
+
+  def Shutdown(self):
+    if self.m_thread is None:
+      return
+
+    self.Close()
+
+    self.m_loop.call_soon_threadsafe(self.m_loop.stop)
+    self.m_thread.join(ASYNC_CLOSE_TIMEOUT)
+
+    self.m_thread = None
+    self.m_loop = None
+
+  ########
+  # connection management (called from the service thread)
+
+  # start connecting in the background, poll IsConnecting()/HasConnectResult()
+  def BeginConnect(self, address):
+    self.Start()
+    self.m_futConnect = asyncio.run_coroutine_threadsafe(self.ConnectCoro(address), self.m_loop)
+
+  # applies to connections opened from now on
+  def SetDeadPeerTimeout(self, iDeadPeerTimeout):
+    self.m_iDeadPeerTimeout = iDeadPeerTimeout
+
+  def IsConnecting(self):
+    return self.m_futConnect is not None and not self.m_futConnect.done()
+
+  def HasConnectResult(self):
+    return self.m_futConnect is not None and self.m_futConnect.done()
+
+  # returns (greeting, driverinfo) reply lines, raises if connecting failed
+  def TakeConnectResult(self):
+    futConnect = self.m_futConnect
+    self.m_futConnect = None
+    return futConnect.result()
+
+  def IsOpen(self):
+    return self.m_writer is not None
+
+  def IsConnectionLost(self):
+    return self.m_bConnectionLost
+
+  def SendAll(self, data):
+    self.SendRegistered(data, [])
+
+  # queue data along with the reply entries of its commands (see
+  # LCDprocReplyTracker.CreateEntries()), both get added on the event loop
+  # in one go, so a keepalive can't get in between
+  def SendRegistered(self, data, entries):
+    if self.m_writer is None or self.m_bConnectionLost:
+      raise ConnectionError("LCDprocAsyncEngine: not connected")
+
+    self.m_timeLastWrite = time.time()
+    self.m_loop.call_soon_threadsafe(self.Enqueue, data, entries)
+
+  # flush anything queued and close the connection, waits at most
+  # ASYNC_CLOSE_TIMEOUT seconds for the event loop
+  def Close(self):
+    if self.m_loop is None:
+      return
+
+    if self.m_futConnect is not None:
+      self.m_futConnect.cancel()
+      self.m_futConnect = None
+
+    futClose = asyncio.run_coroutine_threadsafe(self.CloseCoro(), self.m_loop)
+
+    try:
+      futClose.result(ASYNC_CLOSE_TIMEOUT)
+    except:
+      log(LOGWARNING, "LCDprocAsyncEngine: Timeout while closing connection")
+
+    self.m_Tracker.FailAll()
+
+  ########
+  # coroutines and callbacks (run on the event loop thread only)
+
+  def Enqueue(self, data, entries):
+    # closed or lost meanwhile, nobody will ever reply
+    if self.m_writer is None or self.m_bConnectionLost:
+      for entry in entries:
+        entry.Complete(b"")
+      return
+
+    self.m_Tracker.AddPending(entries)
+    self.m_queueSend.put_nowait(data)
+
+  async def ConnectCoro(self, address):
+    await self.CloseCoro()
+
+    if IsUnixSocketAddress(address):
+      coroOpen = asyncio.open_unix_connection(address)
+    else:
+      coroOpen = asyncio.open_connection(address[0], address[1])
+
+    reader, writer = await asyncio.wait_for(coroOpen, TRANSPORT_CONNECT_TIMEOUT)
+
+    try:
+      if not IsUnixSocketAddress(address):
+        EnableTcpKeepalive(writer.get_extra_info("socket"), self.m_iDeadPeerTimeout)
+
+      writer.write(b"hello\n")
+      greeting = await asyncio.wait_for(reader.readline(), ASYNC_REPLY_TIMEOUT)
+
+      # driver information is optional, don't fail on it
+      writer.write(b"info\n")
+      try:
+        driverinfo = await asyncio.wait_for(reader.readline(), ASYNC_REPLY_TIMEOUT)
+      except asyncio.TimeoutError:
+        driverinfo = None
+    except:
+      writer.close()
+      raise
+
+    self.m_reader = reader
+    self.m_writer = writer
+    self.m_queueSend = asyncio.Queue()
+    self.m_bConnectionLost = False
+    self.m_timeLastWrite = time.time()
+
+    self.m_tasks = [asyncio.ensure_future(self.WriterCoro()),
+                    asyncio.ensure_future(self.ReaderCoro()),
+                    asyncio.ensure_future(self.KeepaliveCoro())]
+
+    return (greeting, driverinfo)
+
+  async def CloseCoro(self):
+    for task in self.m_tasks:
+      task.cancel()
+    self.m_tasks = []
+
+    writer = self.m_writer
+    self.m_writer = None
+    self.m_reader = None
+
+    if writer is None:
+      return
+
+    # whatever was queued last (e.g. bye) still goes out
+    try:
+      while not self.m_queueSend.empty():
+        writer.write(self.m_queueSend.get_nowait())
+      await asyncio.wait_for(writer.drain(), ASYNC_CLOSE_TIMEOUT)
+    except:
+      pass
+
+    writer.close()
+
+  def ConnectionLost(self, strWhat):
+    if self.m_bConnectionLost:
+      return
+
+    log(LOGERROR, "LCDprocAsyncEngine: %s, connection lost" % (strWhat))
+    self.m_bConnectionLost = True
+    self.m_Tracker.FailAll()
+
+  async def WriterCoro(self):
+    try:
+      while True:
+        data = await self.m_queueSend.get()
+
+        # merge everything that piled up meanwhile into one write
+        while not self.m_queueSend.empty():
+          data += self.m_queueSend.get_nowait()
+
+        self.m_writer.write(data)
+        await self.m_writer.drain()
+    except asyncio.CancelledError:
+      raise
+    except:
+      self.ConnectionLost("Exception while sending")
+
+  async def ReaderCoro(self):
+    try:
+      while True:
+        reply = await self.m_reader.readline()
+        if reply == b"":
+          self.ConnectionLost("Connection closed by LCDd")
+          return
+
+        self.m_Tracker.HandleReply(reply)
+    except asyncio.CancelledError:
+      raise
+    except:
+      self.ConnectionLost("Exception while reading replies")
+
+  async def KeepaliveCoro(self):
+    scheduler = DeadlineScheduler("LCDprocAsyncEngine keepalive", self.m_fKeepaliveInterval)
+
+    while True:
+      await asyncio.sleep(scheduler.GetTimeout())
+      scheduler.Advance()
+
+      # replies overdue, LCDd seems gone without closing the connection
+      if self.m_Tracker.GetOldestPendingAge() > self.m_iDeadPeerTimeout:
+        self.ConnectionLost("No reply within %i seconds" % (self.m_iDeadPeerTimeout))
+        return
+
+      if (self.m_timeLastWrite + self.m_fKeepaliveInterval) > time.time():
+        continue
+
+      self.m_timeLastWrite = time.time()
+      self.Enqueue(b"noop\n", self.m_Tracker.CreateEntries(b"noop", False))
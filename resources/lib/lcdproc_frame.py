@@ -0,0 +1,231 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lcdproc_frame.py: Per-frame LCDd command assembly
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from .common import *
+
+# widget lifetime commands, their order relative to each other matters
+FRAME_STRUCTURE_PREFIXES = (b"widget_add ", b"widget_del ")
+
+# bytes that can't appear as they are inside a quoted LCDd string argument
+LCDD_QUOTE_SPECIALS = b"\\\"{}\r\n"
+
+# byte -> its representation inside a quoted string: backslash escapes for
+# quotes, backslashes and braces, line breaks would end the command and
+# become spaces
+g_listLCDdQuoteTable = [b"\\" + bytes([c]) if c in b"\\\"{}" else b" " if c in b"\r\n" else bytes([c]) for c in range(256)]
+
+# escape text for use within "..." in LCDd commands
+def QuoteLCDdString(bstrText):
+  # most lines contain nothing to escape, find out with a single translate()
+  if len(bstrText.translate(None, LCDD_QUOTE_SPECIALS)) == len(bstrText):
+    return bstrText
+
+  return b"".join([g_listLCDdQuoteTable[c] for c in bstrText])
+
+# identifies what a command changes on the display, so a later command with
+# the same key supersedes an earlier one
+def FrameCommandKey(bstrCmd):
+  parts = bstrCmd.split(b" ", 3)
+
+  if parts[0] == b"widget_set" and len(parts) >= 3:
+    return (parts[0], parts[1], parts[2])
+
+  # everything else (e.g. output, which sets either icons or bars on some
+  # drivers) is kept, only exact repetitions collapse
+  return bstrCmd
+
+# combine two frames into one that leaves the display in the same state as
+# sending both in order would
+def MergeFrames(bstrOlder, bstrNewer):
+  cmds = {}
+  iStructure = 0
+
+  for bstrFrame in (bstrOlder, bstrNewer):
+    for cmd in bstrFrame.split(b"\n"):
+      if cmd == b"":
+        continue
+
+      # widgets may get deleted and added again, keep every single one
+      if cmd.startswith(FRAME_STRUCTURE_PREFIXES):
+        cmds[iStructure] = cmd
+        iStructure += 1
+        continue
+
+      key = FrameCommandKey(cmd)
+      cmds.pop(key, None)
+      cmds[key] = cmd
+
+  return b"\n".join(cmds.values()) + b"\n"
+
+# Shadow of every widget's last sent state. Each frame starts out with all
+# widgets in their reset state, the renderer sets what it wants displayed,
+# and only the difference to what LCDd already shows gets emitted.
+#
+# Widgets are declared up front but only created on LCDd by the first frame
+# that moves them away from their reset state, a widget that doesn't exist
+# looks the same as one in its reset state.
+class LCDprocFrameAssembler():
+  def __init__(self):
+    self.m_defaults = {}
+    self.m_sent = {}
+    # desired state of the current frame, keeps insertion order
+    self.m_cmds = {}
+    # widget_set key -> (declaration order, widget_add, widget_del)
+    self.m_widgets = {}
+    self.m_created = set()
+    self.m_bDeleteUnused = False
+    self.m_iSuperseded = 0
+    self.m_iUnchanged = 0
+    self.m_iWidgetsAdded = 0
+    self.m_iWidgetsDeleted = 0
+
+  # forget all widgets, e.g. on a new LCDd session
+  def ResetWidgets(self):
+    self.m_defaults = {}
+    self.m_sent = {}
+    self.m_cmds = {}
+    self.m_widgets = {}
+    self.m_created = set()
+
+  # declare a widget LCDd doesn't know about yet along with its reset state
+  # (a widget_set command without lf)
+  def DeclareWidget(self, bstrScreen, bstrWidget, bstrType, bstrResetCmd):
+    key = (b"widget_set", bstrScreen, bstrWidget)
+
+    self.m_widgets[key] = (len(self.m_widgets),
+                           b"widget_add %s %s %s" % (bstrScreen, bstrWidget, bstrType),
+                           b"widget_del %s %s" % (bstrScreen, bstrWidget))
+    self.m_defaults[key] = bstrResetCmd
+    self.m_sent[key] = bstrResetCmd
+    self.m_cmds[key] = bstrResetCmd
+
+  # delete widgets as soon as a frame puts them back into their reset state
+  def SetDeleteUnused(self, bDeleteUnused):
+    self.m_bDeleteUnused = bDeleteUnused
+
+  # record one or more lf-terminated commands, any earlier command for the
+  # same widget in this frame is superseded
+  def Add(self, bstrCmds):
+    for cmd in bstrCmds.split(b"\n"):
+      if cmd == b"":
+        continue
+
+      key = FrameCommandKey(cmd)
+      if key in self.m_cmds and self.m_cmds[key] != self.m_defaults.get(key):
+        self.m_iSuperseded += 1
+
+      self.m_cmds[key] = cmd
+
+  def ResetWidget(self, bstrScreen, bstrWidget):
+    key = (b"widget_set", bstrScreen, bstrWidget)
+    if key in self.m_defaults:
+      self.m_cmds[key] = self.m_defaults[key]
+
+  def ResetAll(self):
+    self.m_cmds = dict(self.m_defaults)
+
+  # returns the commands needed to get from what LCDd shows to this
+  # frame's desired state and starts a new frame
+  def Pop(self):
+    out = self.CreateWidgets()
+
+    for key, cmd in self.m_cmds.items():
+      if type(key) is tuple:
+        if self.m_sent.get(key) == cmd:
+          self.m_iUnchanged += 1
+          continue
+
+        self.m_sent[key] = cmd
+
+        if self.m_bDeleteUnused and key in self.m_created and cmd == self.m_defaults[key]:
+          self.m_created.discard(key)
+          self.m_iWidgetsDeleted += 1
+          out.append(self.m_widgets[key][2])
+          continue
+
+      out.append(cmd)
+
+    self.m_cmds = dict(self.m_defaults)
+
+    if len(out) == 0:
+      return b""
+
+    return b"\n".join(out) + b"\n"
+
+  # widget_add (and widget_del) commands for everything this frame needs but
+  # LCDd doesn't have yet
+  def CreateWidgets(self):
+    create = [key for key, cmd in self.m_cmds.items() if key in self.m_widgets and key not in self.m_created and cmd != self.m_defaults[key]]
+
+    if len(create) == 0:
+      return []
+
+    out = []
+
+    # LCDd draws widgets in the order they were added, so everything that
+    # was declared later (e.g. icons) gets re-added on top
+    iFirst = min(self.m_widgets[key][0] for key in create)
+    restack = [key for key in self.m_created if self.m_widgets[key][0] > iFirst]
+
+    for key in restack:
+      out.append(self.m_widgets[key][2])
+      self.m_created.discard(key)
+      self.m_sent[key] = self.m_defaults[key]
+
+      if self.m_cmds[key] != self.m_defaults[key]:
+        create.append(key)
+
+    for key in sorted(create, key=lambda key: self.m_widgets[key][0]):
+      out.append(self.m_widgets[key][1])
+      self.m_created.add(key)
+      self.m_iWidgetsAdded += 1
+
+      # a fresh widget needs its desired state no matter what was sent
+      self.m_sent[key] = None
+
+    return out
+
+  # snapshot of the widget states LCDd was last sent, see Restore()
+  def GetState(self):
+    return dict(self.m_sent)
+
+  # make the current frame bring a freshly set up display back to a state
+  # taken by GetState(), widgets that don't exist anymore are skipped
+  def Restore(self, state):
+    for key, cmd in state.items():
+      if key in self.m_defaults:
+        self.m_cmds[key] = cmd
+
+  # drop the current frame without sending anything
+  def Clear(self):
+    self.m_cmds = dict(self.m_defaults)
+
+  def GetSupersededCount(self):
+    return self.m_iSuperseded
+
+  def GetUnchangedCount(self):
+    return self.m_iUnchanged
+
+  def GetWidgetCounts(self):
+    return (self.m_iWidgetsAdded, self.m_iWidgetsDeleted)
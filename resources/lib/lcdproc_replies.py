@@ -0,0 +1,181 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lcdproc_replies.py: Asynchronous reply accounting for
+                                      pipelined LCDd commands
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import threading
+import time
+
+from collections import deque
+
+from .common import *
+
+# LCDd messages that are not replies to any command we sent
+REPLY_SKIP_PREFIXES = (b"listen", b"ignore", b"key", b"menuevent")
+
+class LCDprocPendingReply():
+  def __init__(self, bstrCmd, bCheckRet):
+    self.m_bstrCmd = bstrCmd
+    self.m_bCheckRet = bCheckRet
+    self.m_bstrReply = None
+    self.m_bSuccess = False
+    self.m_timeSent = time.time()
+    self.m_evDone = threading.Event() if bCheckRet else None
+
+  def IsSuccessReply(self, reply):
+    if self.m_bstrCmd == b"noop" and reply == b"noop complete\n":
+      return True # noop has special reply
+
+    return reply == b"success\n"
+
+  def Complete(self, reply):
+    self.m_bstrReply = reply
+    self.m_bSuccess = self.IsSuccessReply(reply)
+
+    if self.m_evDone is not None:
+      self.m_evDone.set()
+
+class LCDprocReplyTracker():
+  def __init__(self):
+    self.m_lock = threading.Lock()
+    self.m_pending = deque()
+    self.Reset()
+
+  def Reset(self):
+    with self.m_lock:
+      self.FailAllLocked()
+      self.m_iRepliesOk = 0
+      self.m_iRepliesFailed = 0
+      self.m_iRepliesUnexpected = 0
+
+  # register every command in bstrCmds (one per line) as awaiting a reply,
+  # must happen before the commands are written to the socket
+  def Register(self, bstrCmds, bCheckRet):
+    entries = self.CreateEntries(bstrCmds, bCheckRet)
+    self.AddPending(entries)
+    return entries
+
+  # reply entries for the commands in bstrCmds, not awaiting anything until
+  # passed to AddPending()
+  def CreateEntries(self, bstrCmds, bCheckRet):
+    return [LCDprocPendingReply(cmd, bCheckRet) for cmd in bstrCmds.split(b"\n") if cmd != b""]
+
+  # entries must be added in the same order their commands are written
+  def AddPending(self, entries):
+    with self.m_lock:
+      self.m_pending.extend(entries)
+
+  # match a reply line against the oldest outstanding command, returns False
+  # if the line was no reply at all (e.g. key events)
+  def HandleReply(self, reply):
+    if reply.startswith(REPLY_SKIP_PREFIXES):
+      return False
+
+    with self.m_lock:
+      if len(self.m_pending) == 0:
+        self.m_iRepliesUnexpected += 1
+        entry = None
+      else:
+        entry = self.m_pending.popleft()
+        entry.Complete(reply)
+
+        if entry.m_bSuccess:
+          self.m_iRepliesOk += 1
+        else:
+          self.m_iRepliesFailed += 1
+
+    if entry is None:
+      log(LOGDEBUG, "Unexpected reply from LCDd: '%s'" % (reply.decode("ascii", errors="replace").strip()))
+    elif not entry.m_bSuccess:
+      log(LOGWARNING, "Reply to '%s' was '%s'" % (entry.m_bstrCmd.decode("ascii", errors="replace"), reply.decode("ascii", errors="replace").strip()))
+
+    return True
+
+  # wake up everyone waiting for replies that will never arrive
+  def FailAllLocked(self):
+    while len(self.m_pending) > 0:
+      self.m_pending.popleft().Complete(b"")
+
+  def FailAll(self):
+    with self.m_lock:
+      self.FailAllLocked()
+
+  # block until all given entries got their reply or timeout passed,
+  # returns True only if all replies signalled success
+  def WaitFor(self, entries, timeout):
+    deadline = time.time() + timeout
+
+    for entry in entries:
+      if not entry.m_evDone.wait(max(deadline - time.time(), 0)):
+        return False
+
+    return all(entry.m_bSuccess for entry in entries)
+
+  def GetPendingCount(self):
+    return len(self.m_pending)
+
+  def GetOldestPendingAge(self):
+    with self.m_lock:
+      if len(self.m_pending) == 0:
+        return 0.0
+
+      return time.time() - self.m_pending[0].m_timeSent
+
+  def GetStats(self):
+    with self.m_lock:
+      return (self.m_iRepliesOk, self.m_iRepliesFailed, self.m_iRepliesUnexpected, len(self.m_pending))
+
+class LCDprocReplyReader(threading.Thread):
+  def __init__(self, fnReadLine, tracker):
+    threading.Thread.__init__(self, name="LCDprocReplyReader")
+    self.daemon = True
+
+    # fnReadLine() must return a complete line, None on timeout and raise
+    # on connection loss
+    self.m_fnReadLine = fnReadLine
+    self.m_Tracker = tracker
+    self.m_bStop = False
+    self.m_bConnectionLost = False
+
+  def Stop(self):
+    self.m_bStop = True
+
+  def IsConnectionLost(self):
+    return self.m_bConnectionLost
+
+  def run(self):
+    while not self.m_bStop:
+      try:
+        reply = self.m_fnReadLine()
+      except:
+        if not self.m_bStop:
+          log(LOGERROR, "LCDprocReplyReader: Exception while reading replies, connection lost")
+        self.m_bConnectionLost = True
+        break
+
+      if reply is None:
+        continue
+
+      self.m_Tracker.HandleReply(reply)
+
+    self.m_Tracker.FailAll()
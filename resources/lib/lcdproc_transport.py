@@ -0,0 +1,191 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lcdproc_transport.py: Buffered raw socket transport for
+                                        the LCDd text protocol
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import select
+import socket
+
+TRANSPORT_CONNECT_TIMEOUT = 3
+TRANSPORT_SEND_TIMEOUT = 3
+TRANSPORT_RECVBUF_SIZE = 4096
+TRANSPORT_DEADPEER_TIMEOUT = 10
+
+# LCDd addresses are either (host, port) tuples or a unix domain socket path
+def IsUnixSocketAddress(address):
+  return isinstance(address, str)
+
+def FormatAddress(address):
+  if IsUnixSocketAddress(address):
+    return "unix:" + address
+
+  return "%s:%s" % (str(address[0]), str(address[1]))
+
+# let the kernel probe an idle TCP peer and give up on unacknowledged data,
+# so a vanished LCDd host turns into a socket error after roughly
+# iDeadPeerTimeout seconds
+def EnableTcpKeepalive(sock, iDeadPeerTimeout):
+  sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+  iProbeInterval = max(int(iDeadPeerTimeout / 3), 1)
+
+  # fine tuning is not available on every platform, keep system defaults then
+  for strOption, iValue in (("TCP_KEEPIDLE", iProbeInterval),
+                            ("TCP_KEEPINTVL", iProbeInterval),
+                            ("TCP_KEEPCNT", 2),
+                            ("TCP_USER_TIMEOUT", iDeadPeerTimeout * 1000)):
+    if not hasattr(socket, strOption):
+      continue
+
+    try:
+      sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, strOption), iValue)
+    except OSError:
+      pass
+
+class LCDprocTransport():
+  def __init__(self):
+    self.m_socket = None
+    self.m_iDeadPeerTimeout = TRANSPORT_DEADPEER_TIMEOUT
+    self.m_bSocketError = False
+
+    # receive buffer, valid data lives in [m_iBufStart:m_iBufEnd]
+    self.m_bufRecv = bytearray(TRANSPORT_RECVBUF_SIZE)
+    self.m_viewRecv = memoryview(self.m_bufRecv)
+    self.m_iBufStart = 0
+    self.m_iBufEnd = 0
+
+  def Open(self, address, timeout=TRANSPORT_CONNECT_TIMEOUT):
+    self.Close()
+
+    if IsUnixSocketAddress(address):
+      if not hasattr(socket, "AF_UNIX"):
+        raise OSError("LCDprocTransport: unix domain sockets not supported on this platform")
+
+      sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      try:
+        sock.settimeout(timeout)
+        sock.connect(address)
+      except:
+        sock.close()
+        raise
+    else:
+      sock = socket.create_connection(address, timeout)
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      EnableTcpKeepalive(sock, self.m_iDeadPeerTimeout)
+
+    sock.settimeout(TRANSPORT_SEND_TIMEOUT)
+    self.m_socket = sock
+    self.m_bSocketError = False
+
+  # applies to connections opened from now on
+  def SetDeadPeerTimeout(self, iDeadPeerTimeout):
+    self.m_iDeadPeerTimeout = iDeadPeerTimeout
+
+  def IsOpen(self):
+    return self.m_socket is not None
+
+  # pending error on the socket (e.g. keepalive probes went unanswered),
+  # sticky as reading SO_ERROR clears it
+  def HasSocketError(self):
+    sock = self.m_socket
+    if sock is None or self.m_bSocketError:
+      return self.m_bSocketError
+
+    try:
+      self.m_bSocketError = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0
+    except OSError:
+      self.m_bSocketError = True
+
+    return self.m_bSocketError
+
+  def Close(self):
+    sock = self.m_socket
+    self.m_socket = None
+    self.m_iBufStart = 0
+    self.m_iBufEnd = 0
+
+    if sock is None:
+      return
+
+    # shutdown first, wakes up any reader blocked on this socket
+    try:
+      sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
+
+    sock.close()
+
+  def SendAll(self, data):
+    sock = self.m_socket
+    if sock is None:
+      raise ConnectionError("LCDprocTransport: not connected")
+
+    sock.sendall(data)
+
+  # returns the next complete line including its lf, None if no line arrived
+  # within timeout; raises ConnectionError if the connection went away
+  def ReadLine(self, timeout):
+    while True:
+      iLineEnd = self.m_bufRecv.find(b"\n", self.m_iBufStart, self.m_iBufEnd)
+      if iLineEnd >= 0:
+        line = bytes(self.m_viewRecv[self.m_iBufStart:iLineEnd + 1])
+        self.m_iBufStart = iLineEnd + 1
+
+        if self.m_iBufStart == self.m_iBufEnd:
+          self.m_iBufStart = 0
+          self.m_iBufEnd = 0
+
+        return line
+
+      sock = self.m_socket
+      if sock is None:
+        raise ConnectionError("LCDprocTransport: not connected")
+
+      readable, _, _ = select.select([sock], [], [], timeout)
+      if not readable:
+        return None
+
+      self.MakeRoom()
+
+      iRead = sock.recv_into(self.m_viewRecv[self.m_iBufEnd:])
+      if iRead == 0:
+        raise ConnectionError("LCDprocTransport: connection closed by peer")
+
+      self.m_iBufEnd += iRead
+
+  # move a pending partial line to the start of the buffer, grow if full
+  def MakeRoom(self):
+    if self.m_iBufEnd < len(self.m_bufRecv):
+      return
+
+    iPending = self.m_iBufEnd - self.m_iBufStart
+
+    if iPending == len(self.m_bufRecv):
+      self.m_viewRecv.release()
+      self.m_bufRecv.extend(bytes(len(self.m_bufRecv)))
+      self.m_viewRecv = memoryview(self.m_bufRecv)
+    else:
+      self.m_bufRecv[0:iPending] = bytes(self.m_viewRecv[self.m_iBufStart:self.m_iBufEnd])
+
+    self.m_iBufStart = 0
+    self.m_iBufEnd = iPending
@@ -0,0 +1,128 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lcdproc_writer.py: Background frame writer with a bounded
+                                     frame queue
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import threading
+import time
+
+from collections import deque
+
+from .common import *
+from .lcdproc_frame import *
+
+FRAMEQUEUE_MAX_DEPTH = 2
+FRAMEQUEUE_DROPLOG_INTERVAL = 60
+
+class LCDprocFrameQueue():
+  def __init__(self, iMaxDepth):
+    self.m_iMaxDepth = iMaxDepth
+    self.m_cond = threading.Condition()
+    self.m_frames = deque()
+    self.m_iDropped = 0
+    self.m_iDroppedLogged = 0
+    self.m_timeDropLog = 0
+
+  def Put(self, bstrFrame):
+    with self.m_cond:
+      # writer is behind, fold the new frame into the last unsent one
+      if len(self.m_frames) >= self.m_iMaxDepth:
+        self.m_frames[-1] = MergeFrames(self.m_frames[-1], bstrFrame)
+        self.m_iDropped += 1
+      else:
+        self.m_frames.append(bstrFrame)
+
+      self.m_cond.notify()
+
+    if self.m_iDropped != self.m_iDroppedLogged and (self.m_timeDropLog + FRAMEQUEUE_DROPLOG_INTERVAL) < time.time():
+      self.m_iDroppedLogged = self.m_iDropped
+      self.m_timeDropLog = time.time()
+      log(LOGWARNING, "LCDd can't keep up, %i frames merged so far (queue depth %i)" % (self.m_iDropped, self.GetDepth()))
+
+  # returns the oldest frame or None if nothing arrived within timeout
+  def Get(self, timeout):
+    with self.m_cond:
+      if len(self.m_frames) == 0:
+        self.m_cond.wait(timeout)
+
+      if len(self.m_frames) == 0:
+        return None
+
+      return self.m_frames.popleft()
+
+  def Clear(self):
+    with self.m_cond:
+      self.m_frames.clear()
+
+  def Wakeup(self):
+    with self.m_cond:
+      self.m_cond.notify_all()
+
+  def GetDepth(self):
+    return len(self.m_frames)
+
+  def GetDropCount(self):
+    return self.m_iDropped
+
+class LCDprocFrameWriter(threading.Thread):
+  def __init__(self, frameQueue, fnSend):
+    threading.Thread.__init__(self, name="LCDprocFrameWriter")
+    self.daemon = True
+
+    self.m_FrameQueue = frameQueue
+    self.m_fnSend = fnSend
+    self.m_bStop = False
+    self.m_bDrain = False
+    self.m_iSent = 0
+
+  # with bDrain set, frames still queued get sent before the thread ends
+  def Stop(self, bDrain=False):
+    self.m_bDrain = bDrain
+    self.m_bStop = True
+    self.m_FrameQueue.Wakeup()
+
+  def GetSentCount(self):
+    return self.m_iSent
+
+  def run(self):
+    while not self.m_bStop:
+      bstrFrame = self.m_FrameQueue.Get(0.5)
+      if bstrFrame is None:
+        continue
+
+      if self.m_bStop and not self.m_bDrain:
+        break
+
+      self.m_fnSend(bstrFrame)
+      self.m_iSent += 1
+
+    if not self.m_bDrain:
+      return
+
+    while True:
+      bstrFrame = self.m_FrameQueue.Get(0)
+      if bstrFrame is None:
+        break
+
+      self.m_fnSend(bstrFrame)
+      self.m_iSent += 1
@@ -0,0 +1,150 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lcdtemplate.py: Compiler for LCD.xml line templates
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import re
+
+from .infolabels import INFOLABEL_BARE_TAG_REGEX
+
+class LCD_SEGMENT:
+  LCD_SEGMENT_LITERAL = 0 # plain text
+  LCD_SEGMENT_KODI    = 1 # $INFO[...], $LOCALIZE[...] etc., evaluated by Kodi
+  LCD_SEGMENT_LOCAL   = 2 # $INFO[LCD.*], handled by the addon itself
+
+g_strSegmentNames = ["literal", "kodi", "local"]
+
+# start of a Kodi label function, e.g. $INFO[ or $LOCALIZE[, Kodi takes them
+# in any case just like the info labels themselves
+g_reLabelFunction = re.compile(r'\$([A-Z]+)\[', flags=re.IGNORECASE)
+
+# $INFO[LCD.Time], $INFO[LCD.TimeWide21] etc.
+g_reBigDigitToken = re.compile(r'^lcd\.time(wide)?\d?\d?$')
+
+# pseudo labels that get removed from the text along with one adjacent
+# whitespace character on each side
+g_setCollapsingTokens = set(["lcd.playicon", "lcd.aligncenter", "lcd.alignright"])
+
+class LcdLineTemplate():
+  def __init__(self, strSource):
+    self.m_strSource = strSource
+    # list of (LCD_SEGMENT, text), for local segments text is the lowercased
+    # token name (e.g. "lcd.playicon")
+    self.m_segments = []
+    self.m_setTokens = set()
+
+    self.Parse(strSource)
+
+    self.m_strKodiLabel = self.BuildKodiLabel()
+    self.m_bLiteral = not any(kind == LCD_SEGMENT.LCD_SEGMENT_KODI for kind, text in self.m_segments)
+
+  def Parse(self, strSource):
+    iPos = 0
+    iLiteralStart = 0
+
+    while True:
+      match = g_reLabelFunction.search(strSource, iPos)
+      if match is None:
+        break
+
+      # find the matching bracket, label functions may be nested
+      iDepth = 1
+      iEnd = match.end()
+      while iEnd < len(strSource) and iDepth > 0:
+        if strSource[iEnd] == "[":
+          iDepth += 1
+        elif strSource[iEnd] == "]":
+          iDepth -= 1
+        iEnd += 1
+
+      # unbalanced, leave the rest to Kodi as it is
+      if iDepth > 0:
+        break
+
+      if match.start() > iLiteralStart:
+        self.m_segments.append((LCD_SEGMENT.LCD_SEGMENT_LITERAL, strSource[iLiteralStart:match.start()]))
+
+      strBody = strSource[match.end():iEnd - 1]
+
+      if match.group(1).upper() == "INFO" and strBody.strip().lower().startswith("lcd."):
+        strToken = strBody.strip().lower()
+        self.m_segments.append((LCD_SEGMENT.LCD_SEGMENT_LOCAL, strToken))
+        self.m_setTokens.add(strToken)
+      else:
+        self.m_segments.append((LCD_SEGMENT.LCD_SEGMENT_KODI, strSource[match.start():iEnd]))
+
+      iPos = iEnd
+      iLiteralStart = iEnd
+
+    if iLiteralStart == 0 and INFOLABEL_BARE_TAG_REGEX.match(strSource):
+      # something like "Player.Time", Kodi evaluates that as single info tag
+      self.m_segments.append((LCD_SEGMENT.LCD_SEGMENT_KODI, strSource))
+    elif iLiteralStart < len(strSource):
+      self.m_segments.append((LCD_SEGMENT.LCD_SEGMENT_LITERAL, strSource[iLiteralStart:]))
+
+  # the template as label for Kodi, all addon-local tokens removed
+  def BuildKodiLabel(self):
+    strLabel = ""
+    bSkipSpace = False
+
+    for kind, text in self.m_segments:
+      if kind == LCD_SEGMENT.LCD_SEGMENT_LOCAL:
+        # unknown local tokens evaluate to nothing
+        if text not in g_setCollapsingTokens:
+          continue
+
+        if len(strLabel) > 0 and strLabel[-1].isspace():
+          strLabel = strLabel[:-1]
+
+        strLabel += " "
+        bSkipSpace = True
+        continue
+
+      if bSkipSpace and len(text) > 0 and text[0].isspace():
+        text = text[1:]
+
+      bSkipSpace = False
+      strLabel += text
+
+    return strLabel.strip()
+
+  def HasToken(self, strToken):
+    return strToken in self.m_setTokens
+
+  # $INFO[LCD.Time...] as very first segment turns the mode into a big clock
+  def IsBigDigitClock(self):
+    if len(self.m_segments) == 0:
+      return False
+
+    kind, text = self.m_segments[0]
+    return kind == LCD_SEGMENT.LCD_SEGMENT_LOCAL and g_reBigDigitToken.match(text) is not None
+
+  # label for Kodi, see BuildKodiLabel()
+  def GetKodiLabel(self):
+    return self.m_strKodiLabel
+
+  # no Kodi segments, GetKodiLabel() already is the final text
+  def IsLiteral(self):
+    return self.m_bLiteral
+
+  def __repr__(self):
+    return "".join("[%s %r]" % (g_strSegmentNames[kind], text) for kind, text in self.m_segments) + " -> %r" % (self.m_strKodiLabel)
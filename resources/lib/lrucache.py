@@ -0,0 +1,58 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/lrucache.py: Small bounded least-recently-used cache
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from collections import OrderedDict
+
+class LRUCache():
+  def __init__(self, iMaxSize):
+    self.m_iMaxSize = iMaxSize
+    self.m_entries = OrderedDict()
+    self.m_iHits = 0
+    self.m_iMisses = 0
+
+  # returns the cached value or None
+  def Get(self, key):
+    value = self.m_entries.get(key)
+
+    if value is None:
+      self.m_iMisses += 1
+      return None
+
+    self.m_entries.move_to_end(key)
+    self.m_iHits += 1
+    return value
+
+  def Put(self, key, value):
+    self.m_entries[key] = value
+    self.m_entries.move_to_end(key)
+
+    if len(self.m_entries) > self.m_iMaxSize:
+      self.m_entries.popitem(last=False)
+
+  def Clear(self):
+    self.m_entries.clear()
+
+  # returns (hits, misses)
+  def GetStats(self):
+    return (self.m_iHits, self.m_iMisses)
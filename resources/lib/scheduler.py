@@ -0,0 +1,137 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/scheduler.py: Drift-free periodic tick scheduling
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import math
+import time
+
+from .common import *
+
+# aligned ticks come this late after the wall clock boundary, so whatever
+# shows the time has already moved on to the new second
+SCHEDULER_ALIGNMENT_DELAY = 0.02
+
+# Ticks are due at absolute points in time on the monotonic clock, so the
+# time spent handling a tick doesn't stretch the period. The scheduler never
+# blocks by itself, callers wait GetTimeout() seconds in whatever way suits
+# them (threading events, asyncio.sleep(), ...).
+# Optionally, ticks are aligned to multiples of the interval on the wall
+# clock, e.g. to full seconds for 1 Hz.
+class DeadlineScheduler():
+  def __init__(self, strName, fInterval):
+    self.m_strName = strName
+    self.m_fInterval = fInterval
+    self.m_bAligned = False
+    self.m_timeDeadline = time.monotonic() + fInterval
+    self.m_iTicks = 0
+    self.m_iOverruns = 0
+    self.m_iSkipped = 0
+    self.m_fOverrunTotal = 0.0
+    self.m_fOverrunMax = 0.0
+
+  # a shorter interval takes effect right away, a longer one after the tick
+  # that is already scheduled
+  def SetInterval(self, fInterval):
+    if fInterval == self.m_fInterval:
+      return
+
+    self.m_fInterval = fInterval
+    self.m_timeDeadline = min(self.m_timeDeadline, self.GetNextDeadline(time.monotonic()))
+
+  def SetAligned(self, bAligned):
+    if bAligned == self.m_bAligned:
+      return
+
+    self.m_bAligned = bAligned
+
+    # the pending tick is less than an interval away either way, so it is
+    # just moved onto the grid
+    if bAligned:
+      self.m_timeDeadline = self.GetNextDeadline(time.monotonic())
+
+  # first deadline after timeFrom (monotonic) if the previous one was missed
+  # or alignment changed
+  def GetNextDeadline(self, timeFrom):
+    if not self.m_bAligned:
+      return timeFrom + self.m_fInterval
+
+    # the wall clock may get adjusted anytime, so the distance to the next
+    # boundary is determined freshly every time
+    timeWall = time.time() + (timeFrom - time.monotonic()) - SCHEDULER_ALIGNMENT_DELAY
+    fToBoundary = (math.floor(timeWall / self.m_fInterval) + 1) * self.m_fInterval - timeWall
+
+    return timeFrom + fToBoundary
+
+  # GetNextAlignedDeadline():
+  # aligned deadline after the tick just handled. A wait returning a little
+  # before the boundary, e.g. with the wall clock being slewed, must not get
+  # the same boundary a second tick, so the search starts half an interval
+  # after the later of now and the deadline just handled.
+  def GetNextAlignedDeadline(self, timeNow):
+    return self.GetNextDeadline(max(timeNow, self.m_timeDeadline) + self.m_fInterval * 0.5)
+
+  # seconds until the next tick is due
+  def GetTimeout(self):
+    return max(self.m_timeDeadline - time.monotonic(), 0.0)
+
+  def IsDue(self):
+    return time.monotonic() >= self.m_timeDeadline
+
+  ########
+  # Advance():
+  # to be called when a due tick gets handled, moves on to the next deadline.
+  # If the previous tick took longer than a whole period, the ticks missed
+  # meanwhile are skipped instead of being run back to back.
+  def Advance(self):
+    timeNow = time.monotonic()
+    fLate = timeNow - self.m_timeDeadline
+    self.m_iTicks += 1
+
+    if fLate < self.m_fInterval:
+      if self.m_bAligned:
+        self.m_timeDeadline = self.GetNextAlignedDeadline(timeNow)
+      else:
+        self.m_timeDeadline += self.m_fInterval
+      return
+
+    iMissed = int(fLate / self.m_fInterval)
+
+    self.m_iOverruns += 1
+    self.m_iSkipped += iMissed
+    self.m_fOverrunTotal += fLate
+    self.m_fOverrunMax = max(self.m_fOverrunMax, fLate)
+
+    if self.m_bAligned:
+      self.m_timeDeadline = self.GetNextAlignedDeadline(timeNow)
+    else:
+      self.m_timeDeadline += (iMissed + 1) * self.m_fInterval
+
+    log(LOGDEBUG, "%s: tick %.0f ms late, skipping %i" % (self.m_strName, fLate * 1000, iMissed))
+
+  def LogStats(self):
+    if self.m_iOverruns > 0:
+      fAverage = self.m_fOverrunTotal / self.m_iOverruns
+    else:
+      fAverage = 0.0
+
+    log(LOGDEBUG, "%s scheduler statistics: %i ticks, %i overruns (%i ticks skipped, %.0f ms late on average, %.0f ms at most)" % (self.m_strName, self.m_iTicks, self.m_iOverruns, self.m_iSkipped, fAverage * 1000, self.m_fOverrunMax * 1000))
@@ -33,8 +33,11 @@ class Settings():
         # init class members (settings) with defaults
         self._hostip              = "127.0.0.1"
         self._hostport            = 13666
+        self._connectiontype      = "0"
+        self._socketpath          = "/var/run/LCDd.sock"
         self._timer               = time.time()
         self._heartbeat           = False
+        self._deadpeertimeout     = 10
         self._scrolldelay         = 1
         self._scrollmode          = "0"
         self._settingsChanged     = True
@@ -45,11 +48,16 @@ class Settings():
         self._dimdelay            = 0
         self._navtimeout          = 3
         self._refreshrate         = 1
+        self._adaptiverefresh     = True
+        self._refreshratemin      = 0.5
+        self._subsecondplaytime   = False
         self._hideconnpopups      = True
         self._usealternatecharset = False
         self._charset             = "iso-8859-1"
         self._useextraelements    = True
         self._systimeformat       = 3
+        self._deleteunusedwidgets = False
+        self._useasyncengine      = False
 
     def getHostIp(self):
         return self._hostip
@@ -57,9 +65,24 @@ class Settings():
     def getHostPort(self):
         return self._hostport
 
+    def getUseUnixSocket(self):
+        return self._connectiontype == "1"
+
+    def getSocketPath(self):
+        return self._socketpath
+
     def getHeartBeat(self):
         return self._heartbeat
 
+    def getDeadPeerTimeout(self):
+        return self._deadpeertimeout
+
+    def getUseAsyncEngine(self):
+        return self._useasyncengine
+
+    def getDeleteUnusedWidgets(self):
+        return self._deleteunusedwidgets
+
     def getUseExtraElements(self):
         return self._useextraelements
 
@@ -95,6 +118,15 @@ class Settings():
     def getRefreshRate(self):
         return self._refreshrate
 
+    def getAdaptiveRefresh(self):
+        return self._adaptiverefresh
+
+    def getRefreshRateMin(self):
+        return self._refreshratemin
+
+    def getSubSecondPlayTime(self):
+        return self._subsecondplaytime
+
     def getHideConnPopups(self):
         return self._hideconnpopups
 
@@ -164,8 +196,12 @@ class Settings():
 
         hostip           = KODI_ADDON_SETTINGS.getSetting("hostip")
         hostport         = int(KODI_ADDON_SETTINGS.getSetting("hostport"))
+        connectiontype   = KODI_ADDON_SETTINGS.getSetting("connectiontype")
+        socketpath       = KODI_ADDON_SETTINGS.getSetting("socketpath")
         heartbeat        = KODI_ADDON_SETTINGS.getSetting("heartbeat") == "true"
         useextraelements = KODI_ADDON_SETTINGS.getSetting("useextraelements") == "true"
+        useasyncengine   = KODI_ADDON_SETTINGS.getSetting("useasyncengine") == "true"
+        deadpeertimeout  = int(float(KODI_ADDON_SETTINGS.getSetting("deadpeertimeout").replace(",", ".")))
 
         # server settings
         # we need to reconnect if networkaccess bool changes
@@ -191,12 +227,39 @@ class Settings():
                 self._heartbeat = heartbeat
                 reconnect = True
 
+        # local LCDd (or a socket relay) reachable through a unix domain socket
+        if self._connectiontype != connectiontype or self._socketpath != socketpath:
+            if self._connectiontype != connectiontype:
+                log(LOGDEBUG, "settings: changed connectiontype to " + str(connectiontype))
+                self._connectiontype = connectiontype
+                reconnect = True
+
+            if self._socketpath != socketpath:
+                log(LOGDEBUG, "settings: changed socketpath to " + str(socketpath))
+                self._socketpath = socketpath
+
+                # path only matters when the socket is actually used
+                if self.getUseUnixSocket():
+                    reconnect = True
+
         # extra element support needs a reinit+reconnect so the extraelement
         # support object resets
         if self._useextraelements != useextraelements:
             self._useextraelements = useextraelements
             reconnect = True
 
+        # switching the connection engine needs a reconnect
+        if self._useasyncengine != useasyncengine:
+            log(LOGDEBUG, "settings: toggled asyncio engine bool")
+            self._useasyncengine = useasyncengine
+            reconnect = True
+
+        # socket keepalive is set up on connect
+        if self._deadpeertimeout != deadpeertimeout:
+            log(LOGDEBUG, "settings: changed deadpeertimeout to " + str(deadpeertimeout))
+            self._deadpeertimeout = deadpeertimeout
+            reconnect = True
+
         return reconnect
 
     def handleLcdSettings(self):
@@ -209,10 +272,14 @@ class Settings():
         dimdelay = int(float(KODI_ADDON_SETTINGS.getSetting("dimdelay").replace(",", ".")))
         navtimeout = int(float(KODI_ADDON_SETTINGS.getSetting("navtimeout").replace(",", ".")))
         refreshrate = int(float(KODI_ADDON_SETTINGS.getSetting("refreshrate").replace(",", ".")))
+        adaptiverefresh = KODI_ADDON_SETTINGS.getSetting("adaptiverefresh") == "true"
+        refreshratemin = float(KODI_ADDON_SETTINGS.getSetting("refreshratemin").replace(",", "."))
+        subsecondplaytime = KODI_ADDON_SETTINGS.getSetting("subsecondplaytime") == "true"
         hideconnpopups = KODI_ADDON_SETTINGS.getSetting("hideconnpopups") == "true"
         usealternatecharset = KODI_ADDON_SETTINGS.getSetting("usealternatecharset") == "true"
         charset = KODI_ADDON_SETTINGS.getSetting("charset")
         systimeformat = KODI_ADDON_SETTINGS.getSetting("systimeformat")
+        deleteunusedwidgets = KODI_ADDON_SETTINGS.getSetting("deleteunusedwidgets") == "true"
 
         if self._scrolldelay != scrolldelay:
             self._scrolldelay = scrolldelay
@@ -254,6 +321,22 @@ class Settings():
 
             self._settingsChanged = True
 
+        if self._adaptiverefresh != adaptiverefresh:
+            self._adaptiverefresh = adaptiverefresh
+            self._settingsChanged = True
+
+        if self._refreshratemin != refreshratemin:
+            self._refreshratemin = refreshratemin
+
+            if refreshratemin < 0.1:
+                self._refreshratemin = 0.1
+
+            self._settingsChanged = True
+
+        if self._subsecondplaytime != subsecondplaytime:
+            self._subsecondplaytime = subsecondplaytime
+            self._settingsChanged = True
+
         if self._hideconnpopups != hideconnpopups:
             self._hideconnpopups = hideconnpopups
             self._settingsChanged = True
@@ -270,6 +353,10 @@ class Settings():
             self._systimeformat = systimeformat
             self._settingsChanged = True
 
+        if self._deleteunusedwidgets != deleteunusedwidgets:
+            self._deleteunusedwidgets = deleteunusedwidgets
+            self._settingsChanged = True
+
     # handles all settings and applies them as needed
     # returns if a reconnect is needed due to settings changes
     def setup(self):
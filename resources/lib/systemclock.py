@@ -0,0 +1,175 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/systemclock.py: Local formatting of Kodi's System.Time and
+                                  System.Date
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import re
+import time
+
+import xbmc
+
+from .common import *
+
+# seconds between re-reads of Kodi's region settings
+CLOCK_REGION_REFRESH_INTERVAL = 60
+
+# clock labels formatted locally, e.g. $INFO[System.Time],
+# $INFO[System.Time(hh:mm xx)] or $INFO[System.Date], in any case just like
+# Kodi takes them
+CLOCK_LABEL_REGEX = re.compile(r'\$INFO\[System\.(Time|Date)(?:\(([^()\[\],]*)\))?\]', flags=re.IGNORECASE)
+
+# strftime() style directives as returned by xbmc.getRegion(), "%-H" being
+# the hour without leading zero
+g_reTimeDirective = re.compile(r'%(-?)([a-zA-Z%])')
+
+# time format tokens of System.Time(format)
+g_reKodiTimeToken = re.compile(r'hh|h|HH|H|mm|m|ss|s|xx|%')
+g_dictKodiTimeTokens = {"hh": "%I", "h": "%-I", "HH": "%H", "H": "%-H", "mm": "%M", "m": "%-M",
+                        "ss": "%S", "s": "%-S", "xx": "%p", "%": "%%"}
+
+class SystemClock():
+
+    ########
+    # ctor
+    def __init__(self):
+        self._timeFormat = "%H:%M"
+        self._meridiem = ("AM", "PM")
+        self._regionRead = None
+
+        # Kodi's day and month names are localized, the date thus still comes
+        # from Kodi, but only once a day
+        self._date = ""
+        self._dateDay = None
+
+        # formats of System.Time(format), converted to strftime() style
+        self._dictKodiFormats = {}
+
+        self._second = None
+        self._tm = None
+
+    # re-reads Kodi's region settings now and then, the user may switch
+    # regions anytime
+    def RefreshRegion(self):
+        now = time.monotonic()
+
+        if self._regionRead is not None and (now - self._regionRead) < CLOCK_REGION_REFRESH_INTERVAL:
+            return
+
+        self._regionRead = now
+        self._dateDay = None
+
+        # without seconds, like Kodi's System.Time
+        timeFormat = re.sub(r'[:.]%-?S', "", xbmc.getRegion("time"))
+        if timeFormat != "":
+            self._timeFormat = timeFormat
+
+        meridiem = xbmc.getRegion("meridiem").split("/")
+        if len(meridiem) == 2:
+            self._meridiem = (meridiem[0], meridiem[1])
+
+    # local time, computed once per second
+    def GetLocalTime(self):
+        now = int(time.time())
+
+        if now != self._second:
+            self._second = now
+            self._tm = time.localtime(now)
+
+        return self._tm
+
+    def FormatTime(self, strFormat):
+        tm = self.GetLocalTime()
+
+        def directive(match):
+            strFlag, strCode = match.groups()
+
+            if strCode == "H":
+                iValue = tm.tm_hour
+            elif strCode == "I":
+                iValue = (tm.tm_hour + 11) % 12 + 1
+            elif strCode == "M":
+                iValue = tm.tm_min
+            elif strCode == "S":
+                iValue = tm.tm_sec
+            elif strCode == "p":
+                return self._meridiem[0 if tm.tm_hour < 12 else 1]
+            elif strCode == "%":
+                return "%"
+            else:
+                return time.strftime("%" + strCode, tm)
+
+            if strFlag == "-":
+                return str(iValue)
+
+            return "%02d" % (iValue)
+
+        return g_reTimeDirective.sub(directive, strFormat)
+
+    ########
+    # GetTime():
+    # the equivalent of System.Time or, given a format like "HH:mm:ss",
+    # System.Time(format)
+    def GetTime(self, strKodiFormat=""):
+        self.RefreshRegion()
+
+        if strKodiFormat == "":
+            return self.FormatTime(self._timeFormat)
+
+        strFormat = self._dictKodiFormats.get(strKodiFormat)
+        if strFormat is None:
+            strFormat = g_reKodiTimeToken.sub(lambda match: g_dictKodiTimeTokens[match.group(0)], strKodiFormat)
+            self._dictKodiFormats[strKodiFormat] = strFormat
+
+        return self.FormatTime(strFormat)
+
+    # the equivalent of System.Date
+    def GetDate(self):
+        self.RefreshRegion()
+
+        tm = self.GetLocalTime()
+        if tm.tm_yday != self._dateDay:
+            self._dateDay = tm.tm_yday
+            self._date = xbmc.getInfoLabel("System.Date")
+
+        return self._date
+
+    ########
+    # SubstituteLabels():
+    # replaces the clock labels in a label template with their values, formats
+    # of System.Date are left to Kodi
+    def SubstituteLabels(self, strLabel):
+        if "$" not in strLabel:
+            return strLabel
+
+        def label(match):
+            strTag, strFormat = match.groups()
+
+            if strTag.lower() == "time":
+                return self.GetTime(strFormat or "")
+
+            if strFormat:
+                return match.group(0)
+
+            return self.GetDate()
+
+        return CLOCK_LABEL_REGEX.sub(label, strLabel)
@@ -0,0 +1,138 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    resources/lib/xbmcevents.py: Kodi player and monitor callbacks that
+                                 trigger immediate renders
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import threading
+import time
+
+import xbmc
+
+from .common import *
+
+# longest stretch WaitForEvent() blocks without checking for Kodi's abort
+# request, Kodi kills addons that don't exit within a few seconds
+EVENT_ABORT_CHECK_INTERVAL = 0.5
+
+# Kodi announcements that change playback or the display mode, these render
+# right away and invalidate cached labels
+EVENT_PLAYBACK_METHODS = set(["Player.OnPlay", "Player.OnStop", "Player.OnPause", "Player.OnResume", "Player.OnAVStart",
+                              "GUI.OnScreensaverActivated", "GUI.OnScreensaverDeactivated"])
+EVENT_PLAYBACK_PREFIXES = ("System.",)
+
+# announcements that only render right away, everything else (library scans,
+# addon messages, ...) is left to the regular tick
+EVENT_RENDER_METHODS = set(["Application.OnVolumeChanged"])
+
+class XBMCPlayerEvents(xbmc.Player):
+    def __init__(self, eventSource):
+        xbmc.Player.__init__(self)
+        self._eventSource = eventSource
+
+    def onAVStarted(self):
+        self._eventSource.Notify("Player.onAVStarted", True)
+
+    def onPlayBackPaused(self):
+        self._eventSource.Notify("Player.onPlayBackPaused", True)
+
+    def onPlayBackResumed(self):
+        self._eventSource.Notify("Player.onPlayBackResumed", True)
+
+    def onPlayBackStopped(self):
+        self._eventSource.Notify("Player.onPlayBackStopped", True)
+
+    def onPlayBackEnded(self):
+        self._eventSource.Notify("Player.onPlayBackEnded", True)
+
+    def onPlayBackSeek(self, time, seekOffset):
+        self._eventSource.Notify("Player.onPlayBackSeek", True)
+
+    def onPlayBackSpeedChanged(self, speed):
+        self._eventSource.Notify("Player.onPlayBackSpeedChanged", True)
+
+class XBMCMonitorEvents(xbmc.Monitor):
+    def __init__(self, eventSource):
+        xbmc.Monitor.__init__(self)
+        self._eventSource = eventSource
+
+    def onNotification(self, sender, method, data):
+        if method in EVENT_PLAYBACK_METHODS or method.startswith(EVENT_PLAYBACK_PREFIXES):
+            self._eventSource.Notify(method, True)
+        elif method in EVENT_RENDER_METHODS:
+            self._eventSource.Notify(method, False)
+
+    def onSettingsChanged(self):
+        self._eventSource.Notify("Monitor.onSettingsChanged", False)
+
+class XBMCEventSource():
+
+    ########
+    # ctor
+    def __init__(self):
+        self._event = threading.Event()
+        self._lastEvent = ""
+        self._eventCount = 0
+        self._invalidateLabels = False
+
+        # callbacks arrive on Kodi's threads, keep references so they stay
+        # registered
+        self._player = XBMCPlayerEvents(self)
+        self._monitor = XBMCMonitorEvents(self)
+
+    def GetMonitor(self):
+        return self._monitor
+
+    # bInvalidateLabels: playback or the display mode changed, see
+    # TakeInvalidateLabels()
+    def Notify(self, strWhat, bInvalidateLabels):
+        self._lastEvent = strWhat
+        self._eventCount += 1
+
+        if bInvalidateLabels:
+            self._invalidateLabels = True
+
+        self._event.set()
+
+    ########
+    # WaitForEvent():
+    # blocks for at most timeout seconds, returns True if anything happened
+    # in Kodi since the last call. Returns early on Kodi's abort request.
+    def WaitForEvent(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        while not self._event.wait(min(max(deadline - time.monotonic(), 0.0), EVENT_ABORT_CHECK_INTERVAL)):
+            if self._monitor.abortRequested() or time.monotonic() >= deadline:
+                return False
+
+        self._event.clear()
+        log(LOGDEBUG, "Render triggered by %s" % (self._lastEvent))
+        return True
+
+    # tells if any event since the last call made cached labels stale
+    def TakeInvalidateLabels(self):
+        bInvalidate = self._invalidateLabels
+        self._invalidateLabels = False
+        return bInvalidate
+
+    def GetEventCount(self):
+        return self._eventCount
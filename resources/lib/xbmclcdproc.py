@@ -34,6 +34,8 @@ import xbmcgui
 from .common import *
 from .settings import *
 from .lcdproc import *
+from .xbmcevents import *
+from .scheduler import *
 
 class XBMCLCDproc():
 
@@ -43,8 +45,10 @@ class XBMCLCDproc():
         self._failedConnectionNotified = False
         self._initialConnectAttempt = True
 
-        # instantiate xbmc.Monitor object
-        self._xbmcMonitor = xbmc.Monitor()
+        # instantiate player/monitor event source, its xbmc.Monitor object
+        # also tells about abort requests
+        self._Events = XBMCEventSource()
+        self._xbmcMonitor = self._Events.GetMonitor()
 
         # instantiate Settings object
         self._Settings = Settings()
@@ -84,7 +88,9 @@ class XBMCLCDproc():
                 self._failedConnectionNotified = False
 
             ret = self._LCDproc.Initialize()
-            if not self._Settings.getHideConnPopups():
+
+            # no notifications while an asynchronous connect is still running
+            if not self._Settings.getHideConnPopups() and not self._LCDproc.IsConnecting():
                 self.HandleConnectionNotification(ret)
 
         return ret
@@ -93,13 +99,79 @@ class XBMCLCDproc():
     # RunLCD():
     # Main loop, triggers data inquiry and rendering, handles setting changes and connection issues
     def RunLCD(self):
-        while not self._xbmcMonitor.waitForAbort(1.0 / float(self._Settings.getRefreshRate())):
+        refreshRate = float(self._Settings.getRefreshRate())
+        ticks = 0
+        timeRateChange = time.monotonic()
+
+        scheduler = DeadlineScheduler("RunLCD", 1.0 / refreshRate)
+        timeNavigationProbe = time.monotonic()
+
+        while not self._xbmcMonitor.abortRequested():
+            # menu movement comes without Kodi events, while ticking slower
+            # than configured it is probed for at the configured rate
+            maxRefreshRate = float(self._Settings.getRefreshRate())
+            probeNavigation = refreshRate < maxRefreshRate
+
+            timeout = scheduler.GetTimeout()
+            if probeNavigation:
+                timeout = min(timeout, max(timeNavigationProbe - time.monotonic(), 0.0))
+
+            # Kodi events render right away, the regular tick only renders
+            # if anything on the display changes by itself
+            bEvent = self._Events.WaitForEvent(timeout)
+
+            if self._xbmcMonitor.abortRequested():
+                break
+
+            bTick = scheduler.IsDue()
+            if bTick:
+                scheduler.Advance()
+
+            if bTick or bEvent:
+                ticks += 1
+
+            bProbe = probeNavigation and time.monotonic() >= timeNavigationProbe
+            if bProbe:
+                timeNavigationProbe = time.monotonic() + 1.0 / maxRefreshRate
+
             if self.HandleConnectLCD():
                 settingsChanged = self._Settings.didSettingsChange()
 
                 if settingsChanged:
                     self._LCDproc.UpdateGUISettings()
 
-                self._LCDproc.Render(settingsChanged)
+                if bEvent and self._Events.TakeInvalidateLabels():
+                    self._LCDproc.InvalidateLabels()
+
+                # picks up LCD.xml edits without dropping the connection
+                layoutChanged = self._LCDproc.CheckLayoutChanged()
+
+                navigationChanged = bProbe and not bEvent and self._LCDproc.HasNavigationChanged()
+
+                if bEvent or settingsChanged or layoutChanged or navigationChanged:
+                    self._LCDproc.Render()
+                elif bTick and self._LCDproc.NeedsRender():
+                    self._LCDproc.Render(True)
+
+                # tick only as often as the last frame needs it, clocks and
+                # play time on wall clock second boundaries
+                newRefreshRate = self._LCDproc.GetRefreshRate()
+                alignTicks = self._LCDproc.IsShowingTime()
+            else:
+                newRefreshRate = float(self._Settings.getRefreshRate())
+                alignTicks = False
+
+            if newRefreshRate != refreshRate:
+                effectiveRate = ticks / max(time.monotonic() - timeRateChange, 0.001)
+                log(LOGDEBUG, "Refresh rate changed from %.2f Hz to %.2f Hz (%.2f Hz effective, Kodi events included)" % (refreshRate, newRefreshRate, effectiveRate))
+
+                refreshRate = newRefreshRate
+                ticks = 0
+                timeRateChange = time.monotonic()
+
+                scheduler.SetInterval(1.0 / refreshRate)
+
+            scheduler.SetAligned(alignTicks)
 
+        scheduler.LogStats()
         self._LCDproc.Shutdown()
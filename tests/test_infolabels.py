@@ -0,0 +1,147 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_infolabels.py: Tests of the InfoLabel snapshots and caches
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+import xbmc
+
+from resources.lib.settings import Settings
+from resources.lib.infolabels import *
+
+class InfoLabelsTest(unittest.TestCase):
+
+    def setUp(self):
+        xbmc.LABELS.clear()
+        xbmc.CONDITIONS.clear()
+
+        self.m_time = 1000000.0
+        patcher = mock.patch("time.time", lambda: self.m_time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        settings = Settings()
+        settings.setup()
+        self.m_InfoLabels = InfoLabels(settings)
+
+    # values of a single template, polled with the given volatility
+    def GetLabel(self, strTemplate, volatility, bAutoDemote=True):
+        return self.m_InfoLabels.GetLabels([strTemplate], [volatility], bAutoDemote)[0]
+
+    def testFast(self):
+        for strValue in ["a", "b", "c"]:
+            xbmc.LABELS["MusicPlayer.Title"] = strValue
+            self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_FAST), strValue)
+
+    def testSlow(self):
+        xbmc.LABELS["MusicPlayer.Title"] = "a"
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW), "a")
+
+        # served from the cache until the slow interval is over
+        xbmc.LABELS["MusicPlayer.Title"] = "b"
+        self.m_time += LABEL_SLOW_INTERVAL - 1
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW), "a")
+
+        self.m_time += 1
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW), "b")
+
+    def testStatic(self):
+        xbmc.LABELS["System.FriendlyName"] = "a"
+        self.assertEqual(self.GetLabel("$INFO[System.FriendlyName]", LABEL_VOLATILITY.LABEL_VOLATILITY_STATIC), "a")
+
+        xbmc.LABELS["System.FriendlyName"] = "b"
+        self.m_time += LABEL_SLOW_INTERVAL
+        self.assertEqual(self.GetLabel("$INFO[System.FriendlyName]", LABEL_VOLATILITY.LABEL_VOLATILITY_STATIC), "a")
+
+        # a mode change makes it due
+        self.m_InfoLabels.InvalidateLabelCache()
+        self.assertEqual(self.GetLabel("$INFO[System.FriendlyName]", LABEL_VOLATILITY.LABEL_VOLATILITY_STATIC), "b")
+
+    def testAutoLiteral(self):
+        # plain text is static
+        for i in range(3):
+            self.assertEqual(self.GetLabel("Kodi running...", LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO), "Kodi running...")
+
+        self.assertEqual(self.m_InfoLabels.GetLabelCacheStats(), (1, 2))
+
+    def testAutoDemote(self):
+        # the first poll as slow label also takes note of what's playing,
+        # which makes it due once more
+        xbmc.LABELS["MusicPlayer.Title"] = "a"
+        for i in range(LABEL_DEMOTE_POLLS + 2):
+            self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO)
+
+        # unchanged for long enough, the label turned slow
+        xbmc.LABELS["MusicPlayer.Title"] = "b"
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO), "a")
+
+        # unless the mode doesn't allow that
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO, False), "b")
+
+        # and a change makes it fast again
+        xbmc.LABELS["MusicPlayer.Title"] = "c"
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO), "c")
+
+    def testPlaybackChange(self):
+        xbmc.LABELS.update({"Player.FilenameAndPath": "/music/a.flac", "MusicPlayer.Title": "a"})
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW), "a")
+
+        # another item started playing, nothing cached is valid anymore
+        xbmc.LABELS.update({"Player.FilenameAndPath": "/music/b.flac", "MusicPlayer.Title": "b"})
+        self.assertEqual(self.GetLabel("$INFO[MusicPlayer.Title]", LABEL_VOLATILITY.LABEL_VOLATILITY_SLOW), "b")
+
+    def testComposite(self):
+        xbmc.LABELS.update({"MusicPlayer.Title": "a", "MusicPlayer.Artist": "b", "MusicPlayer.Album": "c"})
+
+        # all due templates are evaluated with a single call into Kodi
+        iCalls = xbmc.CALLS[0]
+        listValues = self.m_InfoLabels.GetLabels(["$INFO[MusicPlayer.Title]", "$INFO[MusicPlayer.Artist]", "$INFO[MusicPlayer.Album]"],
+                                                 [LABEL_VOLATILITY.LABEL_VOLATILITY_FAST] * 3, True)
+
+        self.assertEqual(listValues, ["a", "b", "c"])
+        self.assertEqual(xbmc.CALLS[0], iCalls + 1)
+
+    def testNavigationChanged(self):
+        xbmc.LABELS.update({"System.CurrentWindow": "Home", "System.CurrentControl": "Videos"})
+
+        # a frame noticed the navigation already
+        self.m_InfoLabels.IsNavigationActive()
+        self.assertFalse(self.m_InfoLabels.HasNavigationChanged())
+
+        xbmc.LABELS["System.CurrentControl"] = "Music"
+        self.assertTrue(self.m_InfoLabels.HasNavigationChanged())
+        self.assertFalse(self.m_InfoLabels.HasNavigationChanged())
+
+        xbmc.LABELS["System.CurrentWindow"] = "Settings"
+        self.assertTrue(self.m_InfoLabels.HasNavigationChanged())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_lcdbase.py: Tests of the render plans and refresh rates
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+import xbmc
+import xbmcaddon
+
+from resources.lib.settings import Settings
+from resources.lib.lcdbase import *
+
+# LCD.xml.defaults on a 20x4 display
+class LcdBaseStub(LcdBase):
+    def GetColumns(self):
+        return 20
+
+    def GetRows(self):
+        return 4
+
+class LcdBaseTest(unittest.TestCase):
+
+    def setUp(self):
+        os.makedirs(xbmcaddon.ADDON_PROFILE, exist_ok=True)
+        xbmc.CONDITIONS.clear()
+
+    def CreateLcd(self, dictSettings=None):
+        xbmcaddon.SETTINGS.update({"refreshrate": "5", "adaptiverefresh": "true", "refreshratemin": "0.5", "subsecondplaytime": "false"})
+        if dictSettings is not None:
+            xbmcaddon.SETTINGS.update(dictSettings)
+
+        settings = Settings()
+        settings.setup()
+
+        lcd = LcdBaseStub(settings)
+        self.assertTrue(lcd.LoadLayout())
+        return lcd
+
+    # render plan of the general mode made up of the given LCD.xml lines
+    def CompilePlan(self, lcd, listLines):
+        lcd.m_lcdMode[LCD_MODE.LCD_MODE_GENERAL] = [lcd.CompileLineDescriptor(strLine, LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO) for strLine in listLines]
+        lcd.InvalidateRenderPlans()
+        return lcd.GetRenderPlan(LCD_MODE.LCD_MODE_GENERAL)
+
+    # the rate UpdateRefreshRate() comes up with after rendering mode
+    def GetRefreshRate(self, lcd, mode, bDimmed=False):
+        lcd.m_iLastRenderMode = mode
+        lcd.m_bCurrentlyDimmed = bDimmed
+
+        lcd.m_InfoLabels.BeginFrame()
+        try:
+            lcd.UpdateRefreshRate()
+        finally:
+            lcd.m_InfoLabels.EndFrame()
+
+        return lcd.GetRefreshRate()
+
+    def testSteadyRate(self):
+        lcd = self.CreateLcd()
+
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_XBE_LAUNCH), LCD_STEADY_REFRESH_RATE)
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_NAVIGATION), 5.0)
+
+    def testFixedRate(self):
+        lcd = self.CreateLcd({"adaptiverefresh": "false"})
+
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_XBE_LAUNCH, True), 5.0)
+
+    def testDimmedRate(self):
+        lcd = self.CreateLcd()
+
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_XBE_LAUNCH, True), 0.5)
+
+    def testDimmedClock(self):
+        lcd = self.CreateLcd()
+
+        # the screensaver's big digits must not skip seconds
+        self.assertTrue(lcd.GetRenderPlan(LCD_MODE.LCD_MODE_SCREENSAVER).m_bShowsTime)
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_SCREENSAVER, True), LCD_STEADY_REFRESH_RATE)
+
+    def testPlayTimeRate(self):
+        xbmc.CONDITIONS["Player.HasMedia"] = True
+
+        lcd = self.CreateLcd({"subsecondplaytime": "true"})
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_MUSIC), LCD_PLAYTIME_REFRESH_RATE)
+
+        # never above the configured rate
+        lcd = self.CreateLcd({"subsecondplaytime": "true", "refreshrate": "1"})
+        self.assertEqual(self.GetRefreshRate(lcd, LCD_MODE.LCD_MODE_MUSIC), 1.0)
+
+    def testTimeLines(self):
+        lcd = self.CreateLcd()
+
+        for strLine in ["$INFO[System.Time]", "Now: $info[system.time(hh:mm:ss)]", "$INFO[System.Date]", "$INFO[Player.FinishTime]"]:
+            plan = self.CompilePlan(lcd, [strLine])
+            self.assertTrue(plan.m_bShowsTime, strLine)
+            self.assertTrue(plan.m_bSelfUpdating, strLine)
+            self.assertFalse(plan.m_bShowsPlayTime, strLine)
+            self.assertEqual(plan.m_listLabelVolatilities, [LABEL_VOLATILITY.LABEL_VOLATILITY_FAST], strLine)
+
+        for strLine in ["$INFO[Player.Time]/$INFO[Player.Duration]", "$INFO[Player.TimeRemaining]", "Player.Time", "$INFO[PVR.EpgEventElapsedTime]"]:
+            plan = self.CompilePlan(lcd, [strLine])
+            self.assertTrue(plan.m_bShowsTime, strLine)
+            self.assertTrue(plan.m_bShowsPlayTime, strLine)
+
+    def testTimeLikeLines(self):
+        lcd = self.CreateLcd()
+
+        # nothing here moves on with the wall clock, the lines keep their
+        # volatility
+        for strLine in ["$INFO[System.Uptime]", "$INFO[ListItem.DateAdded]", "$INFO[System.BuildDate]", "Time to relax $INFO[System.CurrentWindow]", "Date: today"]:
+            plan = self.CompilePlan(lcd, [strLine])
+            self.assertFalse(plan.m_bShowsTime, strLine)
+            self.assertFalse(plan.m_bSelfUpdating, strLine)
+            self.assertEqual(plan.m_listLabelVolatilities, [LABEL_VOLATILITY.LABEL_VOLATILITY_AUTO] * len(plan.m_listLabelLines), strLine)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_lcdproc_frame.py: Tests of the frame assembly for LCDd
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+from resources.lib.lcdproc_frame import *
+
+class QuoteLCDdStringTest(unittest.TestCase):
+
+    def testPlain(self):
+        for bstrText in [b"", b"Pink Floyd - Wish You Were Here", b"12:34 [B]", bytes(range(32, 127)).translate(None, b"\\\"{}")]:
+            self.assertEqual(QuoteLCDdString(bstrText), bstrText)
+
+    def testSpecials(self):
+        self.assertEqual(QuoteLCDdString(b'say "hi"'), b'say \\"hi\\"')
+        self.assertEqual(QuoteLCDdString(b"C:\\Music"), b"C:\\\\Music")
+        self.assertEqual(QuoteLCDdString(b"{x}"), b"\\{x\\}")
+
+        # a line break would end the command
+        self.assertEqual(QuoteLCDdString(b"a\r\nb"), b"a  b")
+
+    def testHighBytes(self):
+        # text already encoded for the display's charset passes unchanged
+        self.assertEqual(QuoteLCDdString(bytes(range(128, 256))), bytes(range(128, 256)))
+        self.assertEqual(QuoteLCDdString(b'\xe4"\xf6'), b'\xe4\\"\xf6')
+
+class MergeFramesTest(unittest.TestCase):
+
+    def testSupersede(self):
+        bstrOlder = b'widget_set xbmc line1 1 1 "a"\nwidget_set xbmc line2 1 2 "b"\n'
+        bstrNewer = b'widget_set xbmc line1 1 1 "c"\n'
+
+        self.assertEqual(MergeFrames(bstrOlder, bstrNewer), b'widget_set xbmc line2 1 2 "b"\nwidget_set xbmc line1 1 1 "c"\n')
+
+    def testKeepStructure(self):
+        # deleting and adding a widget again must survive the merge in order
+        bstrOlder = b'widget_add xbmc icon icon\nwidget_set xbmc icon 1 1 PLAY\n'
+        bstrNewer = b'widget_del xbmc icon\nwidget_add xbmc icon icon\nwidget_set xbmc icon 1 1 PAUSE\n'
+
+        self.assertEqual(MergeFrames(bstrOlder, bstrNewer),
+                         b'widget_add xbmc icon icon\nwidget_del xbmc icon\nwidget_add xbmc icon icon\nwidget_set xbmc icon 1 1 PAUSE\n')
+
+    def testOtherCommands(self):
+        # only exact repetitions of commands other than widget_set collapse
+        self.assertEqual(MergeFrames(b"output 1\nbacklight off\n", b"output 2\nbacklight off\n"), b"output 1\noutput 2\nbacklight off\n")
+
+class LCDprocFrameAssemblerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.m_assembler = LCDprocFrameAssembler()
+        self.DeclareWidgets()
+
+    def DeclareWidgets(self):
+        self.m_assembler.DeclareWidget(b"xbmc", b"line1", b"scroller", b'widget_set xbmc line1 1 1 20 1 m 1 ""')
+        self.m_assembler.DeclareWidget(b"xbmc", b"line2", b"scroller", b'widget_set xbmc line2 1 2 20 2 m 1 ""')
+        self.m_assembler.DeclareWidget(b"xbmc", b"icon", b"icon", b"widget_set xbmc icon 1 1 BLOCK_FILLED")
+
+    def testSupersede(self):
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "a"\n')
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "b"\n')
+
+        self.assertEqual(self.m_assembler.Pop(), b'widget_add xbmc line1 scroller\nwidget_set xbmc line1 1 1 20 1 m 1 "b"\n')
+        self.assertEqual(self.m_assembler.GetSupersededCount(), 1)
+
+    def testUnchanged(self):
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "a"\n')
+        self.m_assembler.Pop()
+
+        # the same frame again has nothing to send
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "a"\n')
+        self.assertEqual(self.m_assembler.Pop(), b"")
+
+    def testResetState(self):
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "a"\n')
+        self.m_assembler.Pop()
+
+        # a frame not setting a widget puts it back into its reset state
+        self.assertEqual(self.m_assembler.Pop(), b'widget_set xbmc line1 1 1 20 1 m 1 ""\n')
+        self.assertEqual(self.m_assembler.Pop(), b"")
+
+    def testDeleteUnused(self):
+        self.m_assembler.SetDeleteUnused(True)
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "a"\n')
+        self.m_assembler.Pop()
+
+        self.assertEqual(self.m_assembler.Pop(), b"widget_del xbmc line1\n")
+        self.assertEqual(self.m_assembler.GetWidgetCounts(), (1, 1))
+
+        # and creates it again once needed
+        self.m_assembler.Add(b'widget_set xbmc line1 1 1 20 1 m 1 "b"\n')
+        self.assertEqual(self.m_assembler.Pop(), b'widget_add xbmc line1 scroller\nwidget_set xbmc line1 1 1 20 1 m 1 "b"\n')
+
+    def testRestack(self):
+        self.m_assembler.Add(b"widget_set xbmc icon 1 1 PLAY\n")
+        self.assertEqual(self.m_assembler.Pop(), b"widget_add xbmc icon icon\nwidget_set xbmc icon 1 1 PLAY\n")
+
+        # the icon was declared after the line, so it is added again to stay
+        # on top of the line created now
+        self.m_assembler.Add(b'widget_set xbmc icon 1 1 PLAY\nwidget_set xbmc line1 1 1 20 1 m 1 "a"\n')
+        self.assertEqual(self.m_assembler.Pop(), b"widget_del xbmc icon\n"
+                                                 b"widget_add xbmc line1 scroller\n"
+                                                 b"widget_add xbmc icon icon\n"
+                                                 b'widget_set xbmc line1 1 1 20 1 m 1 "a"\n'
+                                                 b"widget_set xbmc icon 1 1 PLAY\n")
+
+    def testRestore(self):
+        self.m_assembler.Add(b'widget_set xbmc icon 1 1 PLAY\nwidget_set xbmc line2 1 2 20 2 m 1 "b"\n')
+        self.m_assembler.Pop()
+        state = self.m_assembler.GetState()
+
+        # a new LCDd session starts out without widgets
+        self.m_assembler.ResetWidgets()
+        self.DeclareWidgets()
+        self.m_assembler.Restore(state)
+
+        self.assertEqual(self.m_assembler.Pop(), b"widget_add xbmc line2 scroller\n"
+                                                 b"widget_add xbmc icon icon\n"
+                                                 b'widget_set xbmc line2 1 2 20 2 m 1 "b"\n'
+                                                 b"widget_set xbmc icon 1 1 PLAY\n")
+
+if __name__ == "__main__":
+    unittest.main()
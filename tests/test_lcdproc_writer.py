@@ -0,0 +1,71 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_lcdproc_writer.py: Tests of the queue between renderer and
+                                  frame writer
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+from resources.lib.lcdproc_writer import *
+
+class LCDprocFrameQueueTest(unittest.TestCase):
+
+    def testOrder(self):
+        queue = LCDprocFrameQueue(2)
+        queue.Put(b"widget_set xbmc line1 1 1 a\n")
+        queue.Put(b"widget_set xbmc line2 1 2 b\n")
+
+        self.assertEqual(queue.Get(0), b"widget_set xbmc line1 1 1 a\n")
+        self.assertEqual(queue.Get(0), b"widget_set xbmc line2 1 2 b\n")
+        self.assertIsNone(queue.Get(0))
+
+    def testMergeWhenFull(self):
+        queue = LCDprocFrameQueue(2)
+        queue.Put(b"widget_set xbmc line1 1 1 a\n")
+        queue.Put(b"widget_set xbmc line1 1 1 b\nwidget_set xbmc line2 1 2 c\n")
+
+        # the writer is behind, the newest frame gets folded into the last
+        # one still queued
+        queue.Put(b"widget_set xbmc line1 1 1 d\n")
+
+        self.assertEqual(queue.GetDepth(), 2)
+        self.assertEqual(queue.GetDropCount(), 1)
+        self.assertEqual(queue.Get(0), b"widget_set xbmc line1 1 1 a\n")
+        self.assertEqual(queue.Get(0), b"widget_set xbmc line2 1 2 c\nwidget_set xbmc line1 1 1 d\n")
+
+    def testClear(self):
+        queue = LCDprocFrameQueue(2)
+        queue.Put(b"widget_set xbmc line1 1 1 a\n")
+        queue.Clear()
+
+        self.assertEqual(queue.GetDepth(), 0)
+        self.assertIsNone(queue.Get(0))
+
+if __name__ == "__main__":
+    unittest.main()
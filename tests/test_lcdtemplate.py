@@ -0,0 +1,83 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_lcdtemplate.py: Tests of the LCD.xml line template parser
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+from resources.lib.lcdtemplate import *
+
+class LcdLineTemplateTest(unittest.TestCase):
+
+    def testLocalTokens(self):
+        template = LcdLineTemplate("$INFO[LCD.PlayIcon] $INFO[Player.Time]")
+
+        self.assertTrue(template.HasToken("lcd.playicon"))
+        self.assertEqual(template.GetKodiLabel(), "$INFO[Player.Time]")
+        self.assertFalse(template.IsLiteral())
+
+    def testMixedCase(self):
+        for strSource in ["$info[LCD.ProgressBar]", "$Info[lcd.progressbar]", "$INFO[Lcd.ProgressBar]", "$iNfO[ lCd.PrOgReSsBaR ]"]:
+            template = LcdLineTemplate(strSource)
+
+            self.assertTrue(template.HasToken("lcd.progressbar"), strSource)
+            self.assertEqual(template.GetKodiLabel(), "", strSource)
+            self.assertTrue(template.IsLiteral(), strSource)
+
+    def testMixedCaseAlignment(self):
+        template = LcdLineTemplate("$Info[lcd.PlayIcon] $info[Lcd.AlignCenter] $Info[System.Time]")
+
+        self.assertTrue(template.HasToken("lcd.playicon"))
+        self.assertTrue(template.HasToken("lcd.aligncenter"))
+        self.assertEqual(template.GetKodiLabel(), "$Info[System.Time]")
+
+    def testMixedCaseBigDigits(self):
+        for strSource in ["$INFO[lcd.timewide21]", "$info[LCD.Time]", "$Info[Lcd.TimeWide44]"]:
+            self.assertTrue(LcdLineTemplate(strSource).IsBigDigitClock(), strSource)
+
+        self.assertFalse(LcdLineTemplate("Time: $info[LCD.Time]").IsBigDigitClock())
+
+    def testKodiSegments(self):
+        # label functions other than $INFO[LCD.*] stay with Kodi as they are,
+        # whatever their case
+        for strSource in ["$info[Player.Title]", "$Localize[31000]", "$INFO[Player.Time] / $info[Player.Duration]"]:
+            template = LcdLineTemplate(strSource)
+
+            self.assertEqual(template.GetKodiLabel(), strSource)
+            self.assertFalse(template.IsLiteral(), strSource)
+            self.assertEqual(len(template.m_setTokens), 0, strSource)
+
+    def testNested(self):
+        strSource = "$INFO[Player.Title,$localize[31000] ,]"
+        template = LcdLineTemplate(strSource)
+
+        self.assertEqual(template.m_segments, [(LCD_SEGMENT.LCD_SEGMENT_KODI, strSource)])
+
+if __name__ == "__main__":
+    unittest.main()
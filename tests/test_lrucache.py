@@ -0,0 +1,84 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_lrucache.py: Tests of the bounded least-recently-used cache
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+from resources.lib.lrucache import *
+
+class LRUCacheTest(unittest.TestCase):
+
+    def testEviction(self):
+        cache = LRUCache(2)
+        cache.Put("a", 1)
+        cache.Put("b", 2)
+        cache.Put("c", 3)
+
+        # the oldest entry went away
+        self.assertIsNone(cache.Get("a"))
+        self.assertEqual(cache.Get("b"), 2)
+        self.assertEqual(cache.Get("c"), 3)
+
+    def testRecentlyUsed(self):
+        cache = LRUCache(2)
+        cache.Put("a", 1)
+        cache.Put("b", 2)
+
+        # a lookup makes "a" the most recently used entry, so "b" goes
+        cache.Get("a")
+        cache.Put("c", 3)
+
+        self.assertEqual(cache.Get("a"), 1)
+        self.assertIsNone(cache.Get("b"))
+
+    def testUpdate(self):
+        cache = LRUCache(2)
+        cache.Put("a", 1)
+        cache.Put("b", 2)
+        cache.Put("a", 10)
+        cache.Put("c", 3)
+
+        self.assertEqual(cache.Get("a"), 10)
+        self.assertIsNone(cache.Get("b"))
+
+    def testStats(self):
+        cache = LRUCache(2)
+        cache.Put("a", 1)
+        cache.Get("a")
+        cache.Get("a")
+        cache.Get("b")
+
+        self.assertEqual(cache.GetStats(), (2, 1))
+
+        cache.Clear()
+        self.assertIsNone(cache.Get("a"))
+
+if __name__ == "__main__":
+    unittest.main()
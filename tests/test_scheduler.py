@@ -0,0 +1,146 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_scheduler.py: Tests of the deadline scheduler
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+from resources.lib import scheduler
+from resources.lib.scheduler import *
+
+# monotonic and wall clock under control of the test, the wall clock starts
+# a little after a full second
+class FakeTime():
+    def __init__(self):
+        self.m_timeMonotonic = 100.0
+        self.m_fWallOffset = 1000000.3 - 100.0
+
+    def monotonic(self):
+        return self.m_timeMonotonic
+
+    def time(self):
+        return self.m_timeMonotonic + self.m_fWallOffset
+
+    def Sleep(self, fSeconds):
+        self.m_timeMonotonic += fSeconds
+
+    # wall clock time of a monotonic point in time
+    def Wall(self, timeMonotonic):
+        return timeMonotonic + self.m_fWallOffset
+
+class DeadlineSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.m_time = FakeTime()
+        patcher = mock.patch.object(scheduler, "time", self.m_time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # waits for the next tick and handles it like the service loop does,
+    # returns the wall clock time of the deadline handled
+    def Tick(self, sched, fEarly=0.0, fDuration=0.0):
+        self.m_time.Sleep(max(sched.GetTimeout() - fEarly, 0.0))
+        timeDeadline = sched.m_timeDeadline
+        sched.Advance()
+        self.m_time.Sleep(fDuration)
+        return self.m_time.Wall(timeDeadline)
+
+    def testInterval(self):
+        sched = DeadlineScheduler("test", 0.5)
+
+        self.assertAlmostEqual(sched.GetTimeout(), 0.5)
+        self.Tick(sched, fDuration=0.1)
+
+        # handling the tick doesn't stretch the period
+        self.assertAlmostEqual(sched.GetTimeout(), 0.4)
+
+    def testAligned(self):
+        sched = DeadlineScheduler("test", 1.0)
+        sched.SetAligned(True)
+
+        for i in range(3):
+            timeWall = self.Tick(sched, fDuration=0.01)
+            self.assertAlmostEqual(timeWall, 1000001.0 + i + SCHEDULER_ALIGNMENT_DELAY)
+
+    def testAlignedEarlyWakeup(self):
+        sched = DeadlineScheduler("test", 1.0)
+        sched.SetAligned(True)
+        self.Tick(sched)
+
+        # the wall clock got slewed, the wait returns just before the boundary
+        self.m_time.m_fWallOffset -= 0.025
+        self.Tick(sched)
+
+        # the boundary just handled doesn't get a second tick 20 ms later
+        self.assertGreater(sched.GetTimeout(), 0.5)
+
+    def testOverrun(self):
+        sched = DeadlineScheduler("test", 0.5)
+
+        # handling the first tick takes 1.2 s, the tick due at 1.0 s runs
+        # 0.7 s late and the one at 1.5 s is skipped instead of following
+        # right away
+        self.Tick(sched, fDuration=1.2)
+        self.assertEqual((sched.m_iOverruns, sched.m_iSkipped), (0, 0))
+
+        self.Tick(sched)
+        self.assertEqual((sched.m_iTicks, sched.m_iOverruns, sched.m_iSkipped), (2, 1, 1))
+        self.assertAlmostEqual(sched.m_fOverrunMax, 0.7)
+
+        # the grid stays the same
+        self.assertAlmostEqual(sched.GetTimeout(), 0.3)
+
+    def testAlignedOverrun(self):
+        sched = DeadlineScheduler("test", 1.0)
+        sched.SetAligned(True)
+
+        self.Tick(sched, fDuration=2.3)
+        self.Tick(sched)
+
+        # back on the first boundary at least half an interval after the
+        # late tick
+        self.assertEqual(sched.m_iOverruns, 1)
+        self.assertAlmostEqual(self.m_time.Wall(sched.m_timeDeadline), 1000004.0 + SCHEDULER_ALIGNMENT_DELAY)
+
+    def testSetInterval(self):
+        sched = DeadlineScheduler("test", 1.0)
+
+        # a shorter interval takes effect right away
+        sched.SetInterval(0.25)
+        self.assertAlmostEqual(sched.GetTimeout(), 0.25)
+
+        # a longer one after the pending tick
+        sched.SetInterval(2.0)
+        self.assertAlmostEqual(sched.GetTimeout(), 0.25)
+        self.Tick(sched)
+        self.assertAlmostEqual(sched.GetTimeout(), 2.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tests/test_systemclock.py: Tests of the local System.Time and System.Date
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+# run outside of Kodi on the minimal stand-ins of its modules
+ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOTPATH, "tools", "kodistub"))
+sys.path.insert(0, ROOTPATH)
+
+import xbmc
+
+from resources.lib.systemclock import *
+
+# 14:05:09 local time
+CLOCK_TEST_TIME = time.mktime((2024, 3, 1, 14, 5, 9, 0, 0, -1))
+
+class SystemClockTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("time.time", return_value=CLOCK_TEST_TIME)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        xbmc.LABELS["System.Date"] = "Friday, 1 March 2024"
+        self.m_clock = SystemClock()
+
+    def testTime(self):
+        # region time format from the stub, without seconds
+        self.assertEqual(self.m_clock.GetTime(), "14:05")
+        self.assertEqual(self.m_clock.GetTime("hh:mm:ss xx"), "02:05:09 PM")
+        self.assertEqual(self.m_clock.GetTime("H:m:s"), "14:5:9")
+
+    def testSubstituteLabels(self):
+        self.assertEqual(self.m_clock.SubstituteLabels("$INFO[System.Time] $INFO[System.Date]"), "14:05 Friday, 1 March 2024")
+        self.assertEqual(self.m_clock.SubstituteLabels("$INFO[System.Time(hh:mm:ss)]"), "02:05:09")
+
+        # everything else is left to Kodi
+        for strLabel in ["$INFO[System.Uptime]", "$INFO[System.Date(dd.mm.yyyy)]", "$INFO[Player.Time]", "Time"]:
+            self.assertEqual(self.m_clock.SubstituteLabels(strLabel), strLabel)
+
+    def testSubstituteLabelsMixedCase(self):
+        self.assertEqual(self.m_clock.SubstituteLabels("$info[system.time] $Info[System.DATE]"), "14:05 Friday, 1 March 2024")
+        self.assertEqual(self.m_clock.SubstituteLabels("$INFO[SYSTEM.TIME(HH:mm)]"), "14:05")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tools/bench_bbcode.py: Checks LcdBase.StripBBCode() against the former
+                           regex loop and compares their speed on skin
+                           formatted labels
+
+    usage: python tools/bench_bbcode.py [--labels N]
+
+    Exits with status 1 if any label is stripped differently than by the
+    regex loop.
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import argparse
+import itertools
+import os
+import random
+import re
+import sys
+import time
+
+TOOLSPATH = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(TOOLSPATH, "kodistub"))
+sys.path.insert(0, os.path.dirname(TOOLSPATH))
+
+from resources.lib.settings import Settings
+from resources.lib.lcdbase import LcdBase
+
+BENCH_REPEATS = 5
+
+# labels as skins and PVR backends format them
+BENCH_LABELS = [
+  "[B]Pink Floyd[/B] - [I]Wish You Were Here[/I]",
+  "[COLOR FFFF0000]LIVE[/COLOR] [B]Das Erste HD[/B]",
+  "[B][COLOR white]Tagesschau[/COLOR][/B] [LIGHT](20:00 - 20:15)[/LIGHT]",
+  "[UPPERCASE][B]Now playing[/B][/UPPERCASE]",
+  "[COLOR=red]Recording[/COLOR]",
+  "The Dark Side of the Moon (Remastered)",
+  "Settings [Expert]",
+  "12:34",
+  "Home",
+]
+
+# tags the equivalence check nests, sequences and leaves unbalanced
+CHECK_TAGS = [("[B]", "[/B]"), ("[I]", "[/I]"), ("[COLOR red]", "[/COLOR]"), ("[COLOR FF00FF00]", "[/COLOR]"),
+              ("[UPPERCASE]", "[/UPPERCASE]"), ("[LIGHT]", "[/LIGHT]")]
+
+# StripBBCode() before the single pass tokenizer, kept as reference
+g_reLegacyBBCode = re.compile(r'\[(?P<tagname>[0-9a-zA-Z_\-]+?)[0-9a-zA-Z_\- ]*?\](?P<content>.*?)\[\/(?P=tagname)\]')
+
+def LegacyStripBBCode(strtext):
+  # loop to catch nested tags
+  loopcount = 5
+
+  mangledline = strtext
+
+  while True:
+    loopcount = loopcount - 1
+    mangledline, replacements = g_reLegacyBBCode.subn(r'\g<content>', mangledline)
+
+    if replacements == 0 or loopcount < 1:
+      break
+
+  return mangledline
+
+# nested up to four levels deep, one after another, unbalanced and crossed
+def CheckLabels():
+  listLabels = list(BENCH_LABELS)
+
+  for iDepth in range(1, 5):
+    for tags in itertools.product(CHECK_TAGS, repeat=iDepth):
+      strOpen = "".join(tag[0] for tag in tags)
+      strClose = "".join(tag[1] for tag in reversed(tags))
+
+      listLabels.append(strOpen + "text" + strClose)
+      listLabels.append("a " + strOpen + "b" + strClose + " c " + strOpen + "d" + strClose)
+      listLabels.append(strOpen + "unclosed")
+      listLabels.append("unopened" + strClose)
+
+  for tagOuter, tagInner in itertools.product(CHECK_TAGS, repeat=2):
+    listLabels.append(tagOuter[0] + "x" + tagInner[0] + "y" + tagOuter[1] + "z" + tagInner[1])
+
+  return listLabels
+
+def Bench(fnStrip, listWorkload):
+  fBest = None
+
+  for iRepeat in range(BENCH_REPEATS):
+    fStart = time.perf_counter()
+    for strLabel in listWorkload:
+      fnStrip(strLabel)
+
+    fLabel = (time.perf_counter() - fStart) / len(listWorkload)
+    if fBest is None or fLabel < fBest:
+      fBest = fLabel
+
+  return fBest
+
+def main():
+  parser = argparse.ArgumentParser(description="StripBBCode() equivalence check and benchmark")
+  parser.add_argument("--labels", type=int, default=20000, help="labels per repeat")
+  args = parser.parse_args()
+
+  settings = Settings()
+  settings.setup()
+  lcd = LcdBase(settings)
+
+  listLabels = CheckLabels()
+  iDiffs = 0
+  for strLabel in listLabels:
+    strExpected = LegacyStripBBCode(strLabel)
+    strStripped = lcd.StripBBCodeTags(strLabel)
+
+    if strStripped != strExpected:
+      print("DIFF %r: %r, regex loop %r" % (strLabel, strStripped, strExpected))
+      iDiffs += 1
+
+  print("equivalence: %d of %d labels differ" % (iDiffs, len(listLabels)))
+
+  # one label per text line and frame, most of them the same as the frame
+  # before
+  rand = random.Random(1)
+  listWorkload = [rand.choice(BENCH_LABELS) for i in range(4)] * (args.labels // 4)
+
+  print("regex loop:            %5.0f ns per label" % (Bench(LegacyStripBBCode, listWorkload) * 1e9))
+  print("single pass:           %5.0f ns per label" % (Bench(lcd.StripBBCodeTags, listWorkload) * 1e9))
+  print("single pass and cache: %5.0f ns per label" % (Bench(lcd.StripBBCode, listWorkload) * 1e9))
+
+  sys.exit(1 if iDiffs > 0 else 0)
+
+if __name__ == "__main__":
+  main()
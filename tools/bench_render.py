@@ -0,0 +1,164 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tools/bench_render.py: Per-frame CPU time of LCDProc.Render() on 20x4 and
+                           40x8 displays, run outside of Kodi against a
+                           local fake LCDd
+
+    Only the CPU time of the rendering thread counts, sending the frames and
+    the fake LCDd run on threads of their own. The best of all repeats is
+    reported, run it on an otherwise idle machine.
+
+    usage: python tools/bench_render.py [--frames N] [--repeats N] [--tree PATH]
+
+    --tree renders with the addon found at PATH instead, e.g. a git worktree
+    of an older revision to compare against.
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+TOOLSPATH = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(TOOLSPATH, "kodistub"))
+
+import xbmc
+import xbmcaddon
+
+BENCH_GEOMETRIES = [(20, 4), (40, 8)]
+
+BENCH_LABELS = {
+  "System.CurrentWindow": "Home",
+  "MusicPlayer.Title": "[B]Some Rather Long Song Title[/B] (Remastered 2011)",
+  "MusicPlayer.Artist": "The Artist & Friends",
+  "MusicPlayer.Album": "An Album - Deluxe Edition",
+  "Player.Duration": "03:00",
+}
+
+BENCH_CONDITIONS = {
+  "Player.HasAudio": True,
+  "Player.HasMedia": True,
+  "Player.Playing": True,
+}
+
+# just enough of LCDd to get through the handshake and acknowledge commands
+class FakeLCDd():
+  def __init__(self, iWidth, iHeight):
+    self.m_iWidth = iWidth
+    self.m_iHeight = iHeight
+
+    self.m_sock = socket.socket()
+    self.m_sock.bind(("127.0.0.1", 0))
+    self.m_sock.listen(1)
+    self.m_iPort = self.m_sock.getsockname()[1]
+
+    threading.Thread(target=self.Accept, daemon=True).start()
+
+  def Accept(self):
+    while True:
+      try:
+        conn, addr = self.m_sock.accept()
+      except OSError:
+        return
+
+      threading.Thread(target=self.Serve, args=(conn,), daemon=True).start()
+
+  def Serve(self, conn):
+    try:
+      for line in conn.makefile("rb"):
+        line = line.strip()
+
+        if line == b"hello":
+          conn.sendall(b"connect LCDproc 0.5.9 protocol 0.4 lcd wid %d hgt %d cellwid 5 cellhgt 8\n" % (self.m_iWidth, self.m_iHeight))
+        elif line == b"info":
+          conn.sendall(b"Benchmark driver\n")
+        elif line == b"noop":
+          conn.sendall(b"noop complete\n")
+        elif line == b"bye":
+          break
+        else:
+          conn.sendall(b"success\n")
+    except OSError:
+      pass
+
+    conn.close()
+
+  def Close(self):
+    self.m_sock.close()
+
+def BenchGeometry(LCDProc, Settings, iWidth, iHeight, iFrames, iRepeats):
+  server = FakeLCDd(iWidth, iHeight)
+  xbmcaddon.SETTINGS["hostip"] = "127.0.0.1"
+  xbmcaddon.SETTINGS["hostport"] = str(server.m_iPort)
+
+  settings = Settings()
+  settings.setup()
+  lcd = LCDProc(settings)
+
+  while not lcd.Initialize():
+    time.sleep(0.01)
+
+  # skip the navigation display, the benchmark renders the music screen
+  lcd.m_InfoLabels._nav_oldmenu = "Home"
+  lcd.m_InfoLabels._nav_oldsubmenu = ""
+  lcd.m_InfoLabels._navtimer = 0
+
+  fBest = None
+  for iRepeat in range(iRepeats):
+    fStart = time.thread_time()
+
+    for iFrame in range(iFrames):
+      xbmc.LABELS["Player.Time"] = "00:%02d" % (iFrame % 60)
+      lcd.Render()
+
+    fFrame = (time.thread_time() - fStart) / iFrames
+    if fBest is None or fFrame < fBest:
+      fBest = fFrame
+
+  lcd.Shutdown()
+  server.Close()
+
+  return fBest
+
+def main():
+  parser = argparse.ArgumentParser(description="Per-frame CPU time of LCDProc.Render()")
+  parser.add_argument("--frames", type=int, default=3000, help="frames per repeat")
+  parser.add_argument("--repeats", type=int, default=9, help="repeats, the best one counts")
+  parser.add_argument("--tree", default=os.path.dirname(TOOLSPATH), help="addon to benchmark")
+  args = parser.parse_args()
+
+  sys.path.insert(0, os.path.abspath(args.tree))
+
+  from resources.lib.settings import Settings
+  from resources.lib.lcdproc import LCDProc
+
+  xbmc.LABELS.update(BENCH_LABELS)
+  xbmc.CONDITIONS.update(BENCH_CONDITIONS)
+
+  for iWidth, iHeight in BENCH_GEOMETRIES:
+    fFrame = BenchGeometry(LCDProc, Settings, iWidth, iHeight, args.frames, args.repeats)
+    print("%dx%d: %.1f us CPU per frame" % (iWidth, iHeight, fFrame * 1e6))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,85 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tools/kodistub/xbmc.py: Minimal stand-in for Kodi's xbmc module, only what the
+                            addon uses outside of Kodi (tests, benchmarks)
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import threading
+
+LOGDEBUG   = 0
+LOGINFO    = 1
+LOGWARNING = 2
+LOGERROR   = 3
+LOGFATAL   = 4
+LOGNONE    = 5
+
+# info label -> value and condition -> bool, filled in by whoever uses the stub
+LABELS = {}
+CONDITIONS = {}
+
+# number of getInfoLabel() and getCondVisibility() calls
+CALLS = [0]
+
+def log(msg, level=LOGDEBUG):
+    pass
+
+def getInfoLabel(strLabel):
+    CALLS[0] += 1
+
+    # $INFO[...] templates get their info labels replaced, everything else is
+    # a single info label
+    if "$INFO[" not in strLabel:
+        return LABELS.get(strLabel, "")
+
+    strResult = ""
+    iPos = 0
+    while True:
+        iStart = strLabel.find("$INFO[", iPos)
+        if iStart < 0:
+            break
+
+        iEnd = strLabel.find("]", iStart)
+        strResult += strLabel[iPos:iStart] + LABELS.get(strLabel[iStart + 6:iEnd], "")
+        iPos = iEnd + 1
+
+    return strResult + strLabel[iPos:]
+
+def getCondVisibility(strCondition):
+    CALLS[0] += 1
+    return CONDITIONS.get(strCondition, False)
+
+def getRegion(strId):
+    return {"time": "%H:%M:%S", "datelong": "%A, %d %B %Y", "dateshort": "%d/%m/%Y", "meridiem": "AM/PM"}.get(strId, "")
+
+class Monitor():
+    def __init__(self):
+        self._abort = threading.Event()
+
+    def abortRequested(self):
+        return self._abort.is_set()
+
+    def waitForAbort(self, timeout=None):
+        return self._abort.wait(timeout)
+
+class Player():
+    def __init__(self):
+        pass
@@ -0,0 +1,53 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tools/kodistub/xbmcaddon.py: Minimal stand-in for Kodi's xbmcaddon module,
+                                 settings start out with their defaults from
+                                 resources/settings.xml
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+import tempfile
+import xml.etree.ElementTree as xmltree
+
+ADDON_ROOTPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ADDON_PROFILE = os.path.join(tempfile.gettempdir(), "script.xbmc.lcdproc-stub")
+
+SETTINGS = {}
+for setting in xmltree.parse(os.path.join(ADDON_ROOTPATH, "resources", "settings.xml")).iter("setting"):
+    if setting.get("id") is not None:
+        SETTINGS[setting.get("id")] = setting.get("default", "")
+
+class Addon():
+    def __init__(self, id=None):
+        pass
+
+    def getAddonInfo(self, strId):
+        return {"path": ADDON_ROOTPATH, "profile": ADDON_PROFILE, "version": "0.0.0", "id": "script.xbmc.lcdproc"}.get(strId, "")
+
+    def getSetting(self, strId):
+        return SETTINGS.get(strId, "")
+
+    def setSetting(self, strId, strValue):
+        SETTINGS[strId] = strValue
+
+    def getLocalizedString(self, iId):
+        return str(iId)
@@ -0,0 +1,41 @@
+'''
+    XBMC LCDproc addon
+    Copyright (C) 2012-2018 Team Kodi
+
+    tools/kodistub/xbmcvfs.py: Minimal stand-in for Kodi's xbmcvfs module
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+
+import xbmcaddon
+
+# special:// paths all end up in the stub's profile directory
+def translatePath(strPath):
+    if strPath.startswith("special://"):
+        strPath = os.path.join(xbmcaddon.ADDON_PROFILE, strPath.split("/", 3)[-1])
+
+    return strPath
+
+def exists(strPath):
+    return os.path.exists(strPath)
+
+def mkdirs(strPath):
+    os.makedirs(strPath, exist_ok=True)
+    return True